@@ -1,6 +1,8 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth.models import User
+from django.template.loader import render_to_string
+from forum.tasks import send_email
 
 
 class SignUpForm(UserCreationForm):
@@ -10,3 +12,16 @@ class SignUpForm(UserCreationForm):
     class Meta:
         model = User
         fields = ('username', 'email', 'password1', 'password2')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """renders the reset email in the request and queues it, so SMTP never holds up the page"""
+
+    def send_mail(self, subject_template_name, email_template_name, context,
+                  from_email, to_email, html_email_template_name=None):
+        subject = ''.join(render_to_string(subject_template_name, context).splitlines())
+        html = None
+        if html_email_template_name is not None:
+            html = render_to_string(html_email_template_name, context)
+        send_email.delay(subject=subject, body=render_to_string(email_template_name, context),
+                         from_email=from_email, to=[to_email], html=html)
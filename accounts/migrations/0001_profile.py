@@ -0,0 +1,37 @@
+# Generated by Django 4.2.2 on 2026-10-18 16:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def create_profiles(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('accounts', 'Profile')
+    users = User.objects.annotate(total=Count('posts')).values_list('pk', 'total')
+    Profile.objects.bulk_create(
+        (Profile(user_id=pk, post_count=total) for pk, total in users.iterator()),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('forum', '0005_post_message_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
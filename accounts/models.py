@@ -1,3 +1,12 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class Profile(models.Model):
+    """per-user forum data, kept alongside the auth user"""
+    user = models.OneToOneField(
+        User, related_name='profile', on_delete=models.CASCADE)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return self.user.username
@@ -1,4 +1,6 @@
+from io import StringIO
 from django.core import mail
+from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.test import TestCase
@@ -11,8 +13,15 @@ class PasswordResetEmailTests(TestCase):
             username='john', email='john@doe.com', password='123')
         url = reverse('password_reset')
         self.response = self.client.post(url, {'email': 'john@doe.com'})
+        self.queued = len(mail.outbox)
+        call_command('run_jobs', burst=True, stdout=StringIO())
         self.email = mail.outbox[0]
 
+    def test_email_queued(self):
+        """tests that the email is left to a worker instead of sent by the request"""
+        self.assertEqual(0, self.queued)
+        self.assertEqual(1, len(mail.outbox))
+
     def test_email_subject(self):
         """tests matching email subject"""
         self.assertEqual('[The Forum] Password Reset', self.email.subject)
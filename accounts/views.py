@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from django.utils.decorators import method_decorator
 from django.views.generic import UpdateView
 from django.urls import reverse_lazy
+from forum.caching import author_scopes, bump_on_commit
+from forum.templatetags.gravatar import forget_email
 
 
 def signup(request):
@@ -31,3 +33,11 @@ class UserUpdateView(UpdateView):
 
     def get_object(self):
         return self.request.user
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'email' in form.changed_data:
+            forget_email(form.initial.get('email'))
+            # the avatar on every thread the user has posted in
+            bump_on_commit(*author_scopes(self.object.pk))
+        return response
@@ -0,0 +1,155 @@
+"""
+Read-heavy throughput of the WSGI and ASGI servers at high concurrency.
+
+    python benchmarks/asgi_vs_wsgi.py [--concurrency 200] [--duration 15] [--workers 4]
+                                      [--database-url postgres://...]
+
+Seeds a throwaway SQLite database, or the empty database given, with
+seed_forum, then serves it with gunicorn twice: threaded sync workers on
+mydjangoapp.wsgi, and uvicorn workers on mydjangoapp.asgi with ASYNC_VIEWS. Both runs replay the same mix of
+home, topic list and thread pages, with the page cache off so every request
+reaches the views, and report requests/sec and latency percentiles.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from common import ROOT, summarize
+
+
+def seed(env, forums, topics, posts):
+    """migrates and fills the database in env, returns the urls to read"""
+    os.environ.update(env)
+    from common import setup_django
+    setup_django()
+
+    from django.core.management import call_command
+    from django.urls import reverse
+    from forum.models import Forum, Topic
+
+    call_command('migrate', verbosity=0)
+    call_command('seed_forum', forums=forums, topics=topics, posts=posts,
+                 users=max(topics // 10, 10), stdout=io.StringIO())
+    urls = [reverse('home')]
+    urls.extend(reverse('forum_topics', kwargs={'pk': pk})
+                for pk in Forum.objects.values_list('pk', flat=True))
+    urls.extend(reverse('topic_posts', kwargs={'pk': forum_pk, 'topic_pk': pk})
+                for forum_pk, pk in Topic.objects.values_list('forum_id', 'pk'))
+    return urls
+
+
+async def fetch(port, url, cookie):
+    """one GET on a fresh connection, returns (status, session cookie)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    headers = f'GET {url} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'
+    if cookie:
+        headers += f'Cookie: {cookie}\r\n'
+    writer.write((headers + '\r\n').encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head = response.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'set-cookie' and value.strip().startswith('sessionid='):
+            cookie = value.strip().split(';', 1)[0]
+    return int(head[0].split()[1]), cookie
+
+
+async def reader_loop(port, urls, deadline, latencies, errors, rng):
+    # each task is a reader keeping its session, like a browser would
+    cookie = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status, cookie = await fetch(port, rng.choice(urls), cookie)
+        except OSError:
+            status = None
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors.append(status)
+
+
+async def load(port, urls, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        reader_loop(port, urls, deadline, latencies, errors, random.Random(i))
+        for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(fetch(port, '/', None))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def run_server(name, application, env, args, urls):
+    port = args.port
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', application, '-c', str(ROOT / 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers)],
+        cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(port)
+        asyncio.run(load(port, urls, args.concurrency, args.warmup))
+        latencies, errors, elapsed = asyncio.run(
+            load(port, urls, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+    return {'server': name, **summarize(latencies, elapsed), 'failed': len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15, help='seconds per server')
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help='threads per WSGI worker')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--forums', type=int, default=5)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=6000)
+    parser.add_argument('--database-url', help='an empty database to seed instead of SQLite')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            'DATABASE_URL': args.database_url or f'sqlite:///{directory}/bench.sqlite3',
+            'CACHE_PAGE_SECONDS': '0',
+        }
+        urls = seed(env, args.forums, args.topics, args.posts)
+        env = {**os.environ, **env}
+        results = [
+            run_server('wsgi', 'mydjangoapp.wsgi:application', {
+                **env, 'GUNICORN_WORKER_CLASS': 'gthread',
+                'GUNICORN_THREADS': str(args.threads)}, args, urls),
+            run_server('asgi', 'mydjangoapp.asgi:application', {
+                **env, 'GUNICORN_WORKER_CLASS': 'uvicorn.workers.UvicornWorker',
+                'ASYNC_VIEWS': 'True'}, args, urls),
+        ]
+    print(json.dumps({
+        'database': env['DATABASE_URL'].split(':', 1)[0],
+        'concurrency': args.concurrency,
+        'workers': args.workers,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / 'benchmarks' / 'results'
+
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mydjangoapp.settings')
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+@contextmanager
+def temporary_database():
+    """
+    creates and migrates a throwaway copy of the default database, like the
+    test runner does, keeping SQLite on disk so locking behaves as in production
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from forum.counters import topic_views
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'bench.sqlite3')
+        connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            yield connection
+        finally:
+            # written to the throwaway copy while it exists; whatever is left
+            # would otherwise be flushed at exit into the real database
+            topic_views.flush()
+            topic_views.discard()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+def percentile(values, pct):
+    """nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """throughput and latency percentiles, latencies in seconds"""
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def peak_rss_mb(pid=None):
+    """
+    peak resident memory of this process, or of another one on Linux,
+    None when it cannot be read
+    """
+    if pid is None:
+        # kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_revision():
+    """the checked out commit and whether the tree has local changes"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    return {'commit': git('rev-parse', 'HEAD') or None,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def environment():
+    import django
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def save_results(results, output=None):
+    """
+    writes results as JSON to output, a file or a directory defaulting to
+    benchmarks/results, named after the time and commit; returns the path
+    """
+    path = Path(output) if output else RESULTS
+    if path.suffix != '.json':
+        commit = (results.get('git', {}).get('commit') or 'unknown')[:10]
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        path = path / f'{stamp}-{commit}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + '\n')
+    return path
@@ -0,0 +1,53 @@
+"""
+Compares two result files of benchmarks/run.py, scenario by scenario.
+
+    python benchmarks/compare.py BASELINE.json CANDIDATE.json
+
+Prints each metric of the baseline and the candidate with the relative
+change; throughput is better higher, the other metrics lower.
+"""
+import argparse
+import json
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request',
+           'peak_rss_mb', 'failed')
+
+
+def change(before, after):
+    if before is None or after is None:
+        return ''
+    if not before:
+        return '' if not after else 'new'
+    return f'{(after - before) / before:+.1%}'
+
+
+def label(results):
+    commit = (results.get('git') or {}).get('commit') or 'unknown'
+    dirty = '+dirty' if (results.get('git') or {}).get('dirty') else ''
+    return f'{commit[:10]}{dirty}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f'{"":34}{label(baseline):>18}{label(candidate):>18}')
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            continue
+        print(name)
+        for metric in METRICS:
+            old, new = before.get(metric), after.get(metric)
+            print(f'  {metric:32}{str(old):>18}{str(new):>18}  {change(old, new)}')
+
+
+if __name__ == '__main__':
+    main()
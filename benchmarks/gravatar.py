@@ -0,0 +1,50 @@
+"""
+Micro-benchmark of the gravatar filter, uncached versus memoized.
+
+    python benchmarks/gravatar.py [--emails 300] [--calls 100000]
+"""
+import argparse
+import random
+import timeit
+
+from common import setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from forum.templatetags.gravatar import (  # noqa: E402
+    build_gravatar_url, gravatar_url, normalize_email, url_cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--emails', type=int, default=300,
+                        help='distinct active users')
+    parser.add_argument('--calls', type=int, default=100000,
+                        help='filter calls per run')
+    args = parser.parse_args()
+
+    emails = [f'User{i}@Example.com' for i in range(args.emails)]
+    calls = random.Random(0).choices(emails, k=args.calls)
+
+    def uncached():
+        for email in calls:
+            build_gravatar_url(normalize_email(email),
+                               settings.GRAVATAR_SIZE, settings.GRAVATAR_DEFAULT)
+
+    def cached():
+        for email in calls:
+            gravatar_url(email)
+
+    url_cache.clear()
+    results = {
+        'uncached': min(timeit.repeat(uncached, number=1, repeat=5)),
+        'cached': min(timeit.repeat(cached, number=1, repeat=5)),
+    }
+    for name, seconds in results.items():
+        print(f'{name:>9}: {seconds / args.calls * 1e9:8.0f} ns/call')
+    print(f'  speedup: {results["uncached"] / results["cached"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency of the password reset request with the email sent inline against
+queued for run_jobs, on a throwaway copy of the configured database.
+
+    python benchmarks/password_reset.py [--requests 50] [--smtp-delay 200]
+
+Mail goes through an email backend that waits --smtp-delay milliseconds
+per message, standing in for a remote SMTP server. Reported are the mean and
+p95 of the request, and for the queue how long one worker took to send the
+emails afterwards.
+"""
+import argparse
+import json
+import time
+
+from common import percentile, setup_django, temporary_database
+
+setup_django()
+
+from django.contrib.auth.forms import PasswordResetForm  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.auth.views import PasswordResetView  # noqa: E402
+from django.contrib.sessions.middleware import SessionMiddleware  # noqa: E402
+from django.core import mail  # noqa: E402
+from django.core.mail.backends.locmem import EmailBackend  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from accounts.forms import QueuedPasswordResetForm  # noqa: E402
+from forum import jobs  # noqa: E402
+
+
+class SlowEmailBackend(EmailBackend):
+    delay = 0.2
+
+    def send_messages(self, messages):
+        time.sleep(self.delay * len(messages))
+        return super().send_messages(messages)
+
+
+def measure(form_class, count):
+    view = PasswordResetView.as_view(
+        form_class=form_class, template_name='password_reset.html',
+        email_template_name='password_reset_email.html',
+        subject_template_name='password_reset_subject.txt')
+    factory = RequestFactory()
+    latencies = []
+    for i in range(count):
+        request = factory.post('/reset/', {'email': f'user{i}@example.com'})
+        request._dont_enforce_csrf_checks = True
+        SessionMiddleware(lambda request: None).process_request(request)
+        started = time.perf_counter()
+        view(request)
+        latencies.append(time.perf_counter() - started)
+    return {
+        'mean_ms': round(sum(latencies) / count * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--smtp-delay', type=float, default=200,
+                        help='milliseconds the email backend takes per message')
+    args = parser.parse_args()
+    SlowEmailBackend.delay = args.smtp_delay / 1000
+
+    results = {}
+    with temporary_database(), override_settings(EMAIL_BACKEND=f'{__name__}.SlowEmailBackend'):
+        password = make_password('password')
+        User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@example.com', password=password)
+            for i in range(args.requests))
+        results['inline'] = measure(PasswordResetForm, args.requests)
+        mail.outbox.clear()
+        results['queued'] = measure(QueuedPasswordResetForm, args.requests)
+        started = time.perf_counter()
+        jobs.work(burst=True)
+        results['queued']['worker_seconds'] = round(time.perf_counter() - started, 2)
+        results['queued']['sent'] = len(mail.outbox)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Concurrent reply load test against a throwaway copy of the configured database.
+
+    python benchmarks/reply_load.py [--writers 50] [--replies 20]
+
+Every writer is a logged in client posting replies to the same topic, the
+worst case for lock contention. Reports throughput, latency percentiles,
+how many replies failed, e.g. with "database is locked", and per reply the
+queries run and the write lock time: from the first write of a transaction
+to its commit, plus every write run in autocommit. Under contention that
+includes waiting for the lock; run a single writer for the hold time alone.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from common import percentile, setup_django, summarize, temporary_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, connections, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from forum.models import Forum, Topic, Post  # noqa: E402
+
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class WriteLockTimer:
+    """execute_wrapper counting the queries and write lock time of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.held = 0.0
+        self._since = None
+
+    def __call__(self, execute, sql, params, many, context):
+        write = sql.lstrip().split(None, 1)[0].upper() in WRITES
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            connection = context['connection']
+            if write and connection.get_autocommit():
+                self.held += time.perf_counter() - started
+            elif write and self._since is None:
+                self._since = started
+                transaction.on_commit(self._committed, using=connection.alias)
+
+    def _committed(self):
+        self.held += time.perf_counter() - self._since
+        self._since = None
+
+
+def writer(client, url, replies, latencies, errors, costs, barrier):
+    barrier.wait()
+    try:
+        for i in range(replies):
+            timer = WriteLockTimer()
+            started = time.perf_counter()
+            with connection.execute_wrapper(timer):
+                response = client.post(url, {'message': f'Reply {i}'})
+            latencies.append(time.perf_counter() - started)
+            costs.append((timer.queries, timer.held))
+            if response.status_code != 302:
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=50)
+    parser.add_argument('--replies', type=int, default=20,
+                        help='replies posted by each writer')
+    args = parser.parse_args()
+
+    with temporary_database():
+        forum = Forum.objects.create(name='Load', description='Load test')
+        opener = User.objects.create_user(username='opener')
+        topic = Topic.objects.create(subject='Hot topic', forum=forum, opener=opener)
+        Post.objects.create(message='Start', topic=topic, created_by=opener)
+        clients = []
+        for i in range(args.writers):
+            client = Client(raise_request_exception=False)
+            client.force_login(User.objects.create_user(username=f'writer{i}'))
+            clients.append(client)
+        url = reverse('reply', kwargs={'pk': forum.pk, 'topic_pk': topic.pk})
+
+        latencies, errors, costs = [], [], []
+        barrier = threading.Barrier(args.writers + 1)
+        threads = [threading.Thread(target=writer, args=(
+            client, url, args.replies, latencies, errors, costs, barrier))
+            for client in clients]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'database': connection.vendor,
+            'writers': args.writers,
+            **summarize(latencies, elapsed),
+            'failed': len(errors),
+            'stored_replies': Post.objects.filter(topic=topic).count() - 1,
+            'queries_per_reply': round(statistics.fmean(q for q, held in costs), 1),
+            'lock_ms_per_reply': round(statistics.fmean(held for q, held in costs) * 1000, 2),
+            'lock_p99_ms': round(percentile([held for q, held in costs], 99) * 1000, 2),
+        }
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark suite for the forum's hot endpoints, with results saved as JSON.
+
+    python benchmarks/run.py [--scenarios home topic_list deep_thread reply signup]
+                             [--requests 200] [--concurrency 1] [--target client]
+                             [--forums 5] [--topics 500] [--posts 20000] [--users 300]
+                             [--output benchmarks/results]
+
+With the default client target, a throwaway copy of the configured database
+is filled by seed_forum and every request goes through Django's test client
+in this process, which also counts the queries of each request.
+
+    python benchmarks/run.py --target http://127.0.0.1:8000 [--pid SERVER_PID]
+
+runs against a server, e.g. runserver, whose database was filled with
+seed_forum; it is read here, with the same settings, only to pick the urls.
+--pid reports the server's peak RSS instead of this process's.
+
+Every scenario reports throughput, p50/p95/p99 latency, failed requests,
+queries per request and peak RSS. Compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import itertools
+import threading
+import time
+from contextlib import nullcontext
+
+from common import (environment, peak_rss_mb, save_results, setup_django, summarize,
+                    temporary_database)
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from scenarios import (SCENARIOS, ClientTarget, HttpTarget, login_users,  # noqa: E402
+                       make_rng)
+
+
+def worker(target, scenario, count, barrier, latencies, queries, errors):
+    requests = itertools.islice(scenario.requests(), count)
+    barrier.wait()
+    try:
+        for path, data in requests:
+            before = getattr(target, 'queries', 0)
+            started = time.perf_counter()
+            status = target.send(scenario.method, path, data)
+            latencies.append(time.perf_counter() - started)
+            if target.counts_queries:
+                queries.append(target.queries - before)
+            if status != scenario.expected_status:
+                errors.append(status)
+    finally:
+        connections.close_all()
+
+
+def run_scenario(name, args, users):
+    """runs args.requests requests of a scenario over args.concurrency workers"""
+    scenario_class = SCENARIOS[name]
+    targets, scenarios = [], []
+    for i in range(args.concurrency):
+        user = users[i % len(users)] if scenario_class.login and users else None
+        if args.target == 'client':
+            targets.append(ClientTarget(user))
+        else:
+            targets.append(HttpTarget(args.target, user, args.password))
+        scenarios.append(scenario_class(make_rng(args.seed, i)))
+
+    for target, scenario in zip(targets, scenarios):
+        for path, data in itertools.islice(scenario.requests(), args.warmup):
+            target.send(scenario.method, path, data)
+
+    counts = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+              for i in range(args.concurrency)]
+    latencies, queries, errors = [], [], []
+    barrier = threading.Barrier(args.concurrency + 1)
+    threads = [threading.Thread(target=worker, args=(
+        target, scenario, count, barrier, latencies, queries, errors))
+        for target, scenario, count in zip(targets, scenarios, counts)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {**summarize(latencies, elapsed), 'failed': len(errors)}
+    result['queries_per_request'] = (round(sum(queries) / len(queries), 2)
+                                     if queries else None)
+    result['peak_rss_mb'] = peak_rss_mb(args.pid)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='untimed requests per worker before each scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--target', default='client',
+                        help="'client' for the in-process test client, or a server's base url")
+    parser.add_argument('--pid', type=int, help='server process to report the peak RSS of')
+    parser.add_argument('--forums', type=int, default=5)
+    parser.add_argument('--topics', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--password', default='password', help='password of the seeded users')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file or directory, default benchmarks/results')
+    args = parser.parse_args()
+
+    seed = {'forums': args.forums, 'topics': args.topics, 'posts': args.posts,
+            'users': args.users, 'seed': args.seed}
+    database = temporary_database() if args.target == 'client' else nullcontext()
+    with database:
+        if args.target == 'client':
+            call_command('seed_forum', password=args.password, **seed)
+        users = login_users(args.concurrency)
+        results = {
+            **environment(),
+            'target': args.target,
+            'database': connection.vendor,
+            'seed': seed if args.target == 'client' else None,
+            'concurrency': args.concurrency,
+            'settings': {name: getattr(settings, name) for name in (
+                'PAGINATION_MODE', 'POSTS_PER_PAGE', 'CACHE_PAGE_SECONDS', 'ASYNC_VIEWS')},
+            'scenarios': {},
+        }
+        for name in args.scenarios:
+            results['scenarios'][name] = result = run_scenario(name, args, users)
+            print(f"{name:12} {result['throughput_rps']:8} rps  p50 {result['p50_ms']:8} ms  "
+                  f"p99 {result['p99_ms']:8} ms  queries {result['queries_per_request']}  "
+                  f"failed {result['failed']}")
+    print(f'Saved {save_results(results, args.output)}')
+
+
+if __name__ == '__main__':
+    main()
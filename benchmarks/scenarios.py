@@ -0,0 +1,188 @@
+"""
+Scenarios of the benchmark suite and the targets they run against.
+
+A scenario yields requests as (method, path, data); the reply scenario
+needs a logged in client, which the runner gives it. Targets send the
+requests either through Django's test client in this process, counting
+the queries of each request, or over HTTP to a running server.
+"""
+import http.cookiejar
+import itertools
+import random
+import secrets
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from forum.models import Forum, Topic
+
+
+class Scenario:
+    name = None
+    method = 'GET'
+    login = False
+    expected_status = 200
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def requests(self):
+        """endless iterator of (path, data)"""
+        raise NotImplementedError
+
+
+def weighted_cycle(rng, items, weights):
+    while True:
+        yield rng.choices(items, weights)[0]
+
+
+class Home(Scenario):
+    name = 'home'
+
+    def requests(self):
+        return itertools.repeat((reverse('home'), None))
+
+
+class TopicList(Scenario):
+    """the first page of a forum, busy forums more often"""
+    name = 'topic_list'
+
+    def requests(self):
+        forums = list(Forum.objects.values_list('pk', 'topic_count'))
+        pks, weights = zip(*forums)
+        return ((reverse('forum_topics', kwargs={'pk': pk}), None)
+                for pk in weighted_cycle(self.rng, pks, weights))
+
+
+def longest_topics(limit=20):
+    return list(Topic.objects.annotate(length=Count('posts')).order_by(
+        '-length').values_list('forum_id', 'pk', 'length')[:limit])
+
+
+class DeepThread(Scenario):
+    """the last page of the longest threads, reached as a reply redirect would"""
+    name = 'deep_thread'
+
+    def requests(self):
+        topics = longest_topics()
+        return ((reverse('topic_posts', kwargs={'pk': forum, 'topic_pk': topic}) + '?page=last',
+                 None)
+                for forum, topic, length in weighted_cycle(
+                    self.rng, topics, [length for forum, topic, length in topics]))
+
+
+class Reply(Scenario):
+    """logged in users replying to the longest threads"""
+    name = 'reply'
+    method = 'POST'
+    login = True
+    expected_status = 302
+
+    def requests(self):
+        topics = longest_topics()
+        return ((reverse('reply', kwargs={'pk': forum, 'topic_pk': topic}),
+                 {'message': f'Benchmark reply {i}'})
+                for i, (forum, topic, length) in enumerate(weighted_cycle(
+                    self.rng, topics, [length for forum, topic, length in topics])))
+
+
+class Signup(Scenario):
+    """new accounts, with the password hashing that comes with them"""
+    name = 'signup'
+    method = 'POST'
+    expected_status = 302
+
+    def requests(self):
+        # unique across runs against the same database
+        run = secrets.token_hex(4)
+        return ((reverse('signup'), {
+            'username': f'bench{run}{i}',
+            'email': f'bench{run}{i}@example.com',
+            'password1': 'Bench-pass-2024!',
+            'password2': 'Bench-pass-2024!',
+        }) for i in itertools.count())
+
+
+SCENARIOS = {scenario.name: scenario
+             for scenario in (Home, TopicList, DeepThread, Reply, Signup)}
+
+
+def login_users(count):
+    """the most active users, who the reply scenario logs in as"""
+    return list(User.objects.filter(posts__isnull=False).annotate(
+        total=Count('posts')).order_by('-total')[:count])
+
+
+class ClientTarget:
+    """Django's test client, one per worker thread"""
+    counts_queries = True
+
+    def __init__(self, user=None):
+        self.client = Client(raise_request_exception=False)
+        if user is not None:
+            self.client.force_login(user)
+        self.queries = 0
+
+    def _count(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def send(self, method, path, data):
+        with connection.execute_wrapper(self._count):
+            if method == 'POST':
+                return self.client.post(path, data).status_code
+            return self.client.get(path).status_code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTarget:
+    """urllib with a cookie jar against a running server, redirects not followed"""
+    counts_queries = False
+
+    def __init__(self, base_url, user=None, password=None):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+        if user is not None:
+            self.send('GET', reverse('login'), None)
+            self.send('POST', reverse('login'), {
+                'username': user.username, 'password': password})
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def send(self, method, path, data):
+        body = None
+        if method == 'POST':
+            if not self.csrf_token():
+                # the form page sets the CSRF cookie, as it would in a browser
+                self.send('GET', path, None)
+            body = urllib.parse.urlencode(
+                {**data, 'csrfmiddlewaretoken': self.csrf_token()}).encode()
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return None
+
+
+def make_rng(seed, worker):
+    return random.Random(f'{seed}:{worker}')
@@ -0,0 +1,86 @@
+"""
+Per-request session overhead of each session backend on the logged in
+topic list and thread pages, on a throwaway copy of the configured database.
+
+    python benchmarks/session_overhead.py [--requests 300]
+
+For every SESSION_BACKEND a logged in client reads forum_topics and
+topic_posts; reported are the queries per request, those on django_session,
+the mean latency and the session cookie size.
+"""
+import argparse
+import json
+import time
+
+from common import setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from forum.models import Forum, Post, Topic  # noqa: E402
+
+BACKENDS = ('db', 'cached_db', 'cache', 'signed_cookies')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = self.session_queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        self.session_queries += 'django_session' in sql
+        return execute(sql, params, many, context)
+
+
+def measure(user, url, count):
+    client = Client()
+    client.force_login(user)
+    client.get(url)
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for _ in range(count):
+            client.get(url)
+    elapsed = time.perf_counter() - started
+    return {
+        'queries_per_request': round(counter.queries / count, 2),
+        'session_queries_per_request': round(counter.session_queries / count, 2),
+        'mean_ms': round(elapsed / count * 1000, 2),
+        'cookie_bytes': len(client.cookies[settings.SESSION_COOKIE_NAME].value),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    results = {}
+    with temporary_database(), override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600):
+        user = User.objects.create_user(username='reader')
+        forum = Forum.objects.create(name='Sessions', description='Session benchmark')
+        topics = Topic.objects.bulk_create(
+            Topic(subject=f'Topic {i}', forum=forum, opener=user) for i in range(20))
+        Post.objects.bulk_create(
+            Post(message=f'Post {i}', topic=topic, created_by=user)
+            for topic in topics for i in range(10))
+        urls = {
+            'forum_topics': reverse('forum_topics', kwargs={'pk': forum.pk}),
+            'topic_posts': reverse('topic_posts', kwargs={
+                'pk': forum.pk, 'topic_pk': topics[0].pk}),
+        }
+        for backend in BACKENDS:
+            caches[settings.SESSION_CACHE_ALIAS].clear()
+            with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{backend}'):
+                results[backend] = {name: measure(user, url, args.requests)
+                                    for name, url in urls.items()}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Static bytes and requests of a first and a repeat view of the home page, on
+a throwaway copy of the configured database.
+
+    python benchmarks/static_assets.py
+
+Compares the development setup, plain names served by the staticfiles view
+with Last-Modified only, against collectstatic with hashed, precompressed
+files served by WhiteNoise. A browser accepting gzip and brotli
+is simulated: a fresh cached response is reused without a request, any
+other is revalidated with If-Modified-Since and If-None-Match. Bytes are
+response bodies, headers left out.
+"""
+import argparse
+import json
+import re
+import shutil
+import tempfile
+from io import StringIO
+
+from common import setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.views import serve  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client, RequestFactory, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils.cache import get_max_age  # noqa: E402
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+ASSET = re.compile(r'(?:href|src)="({}[^"]+)"'.format(re.escape(settings.STATIC_URL)))
+HASHED_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Browser:
+    """fetches a page and its assets, keeping a cache of the responses"""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.cache = {}
+
+    def view(self, url):
+        page = body(self.fetch(url, {}))
+        totals = {'requests': 1, 'bytes': len(page)}
+        for asset in ASSET.findall(page.decode()):
+            cached = self.cache.get(asset)
+            if cached and get_max_age(cached):
+                continue
+            headers = {}
+            if cached:
+                headers = {key: cached[header] for key, header in (
+                    ('If-Modified-Since', 'Last-Modified'), ('If-None-Match', 'ETag'))
+                    if cached.has_header(header)}
+            response = self.fetch(asset, headers)
+            totals['requests'] += 1
+            totals['bytes'] += len(body(response))
+            if response.status_code == 200:
+                self.cache[asset] = response
+        return totals
+
+
+def development():
+    client, factory = Client(), RequestFactory()
+
+    def fetch(url, headers):
+        headers = {'Accept-Encoding': ACCEPT_ENCODING, **headers}
+        if url.startswith(settings.STATIC_URL):
+            # what runserver does with DEBUG on
+            return serve(factory.get(url, headers=headers),
+                         url[len(settings.STATIC_URL):], insecure=True)
+        return client.get(url, headers=headers)
+    return fetch
+
+
+def production():
+    client = Client()
+    return lambda url, headers: client.get(
+        url, headers={'Accept-Encoding': ACCEPT_ENCODING, **headers})
+
+
+def measure(fetch, url):
+    browser = Browser(fetch)
+    return {'first_view': browser.view(url), 'repeat_view': browser.view(url)}
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+
+    results = {}
+    root = tempfile.mkdtemp()
+    try:
+        with temporary_database(), override_settings(CACHE_PAGE_SECONDS=0):
+            url = reverse('home')
+            results['development'] = measure(development(), url)
+            # DEBUG off, as {% static %} only links hashed names without it
+            with override_settings(
+                    DEBUG=False, STATIC_ROOT=root, STORAGES=HASHED_STORAGES,
+                    MIDDLEWARE=['whitenoise.middleware.WhiteNoiseMiddleware'] + settings.MIDDLEWARE):
+                call_command('collectstatic', interactive=False, stdout=StringIO())
+                results['production'] = measure(production(), url)
+    finally:
+        shutil.rmtree(root)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory of the topic archive against loading a whole topic, on a throwaway
+copy of the configured database.
+
+    python benchmarks/topic_archive.py [--posts 500000] [--format ndjson]
+
+Fills one topic with --posts posts, then reports the peak Python heap, as
+traced by tracemalloc, of streaming its archive through the test client and
+of materializing the same posts the way a list view would.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from common import setup_django, temporary_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from forum.models import Forum, Topic, Post  # noqa: E402
+
+
+def seed(count, batch_size=5000):
+    user = User.objects.create_user(username='moderator', is_staff=True)
+    forum = Forum.objects.create(name='Archive', description='Archive benchmark')
+    topic = Topic.objects.create(subject='Long thread', forum=forum, opener=user)
+    for start in range(0, count, batch_size):
+        batch = [Post(message=f'Reply **{i}** to the long thread, with some words in it.',
+                      topic=topic, created_by=user)
+                 for i in range(start, min(start + batch_size, count))]
+        for post in batch:
+            post.render_message()
+        Post.objects.bulk_create(batch)
+    return user, topic
+
+
+def traced(function):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 2 ** 20, 1), round(time.perf_counter() - started, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=500000)
+    parser.add_argument('--format', choices=('ndjson', 'html'), default='ndjson')
+    args = parser.parse_args()
+
+    with temporary_database():
+        user, topic = seed(args.posts)
+        client = Client()
+        client.force_login(user)
+        url = reverse('topic_archive', kwargs={'pk': topic.forum_id, 'topic_pk': topic.pk})
+
+        def stream():
+            response = client.get(url, {'format': args.format})
+            return sum(len(chunk) for chunk in response.streaming_content)
+
+        def load():
+            return len(list(topic.posts.select_related('created_by__profile').order_by(
+                'created_at', 'pk')))
+
+        streamed, stream_peak, stream_seconds = traced(stream)
+        loaded, load_peak, load_seconds = traced(load)
+
+    print(json.dumps({
+        'posts': args.posts,
+        'format': args.format,
+        'archive': {'bytes': streamed, 'peak_mb': stream_peak, 'seconds': stream_seconds},
+        'list': {'posts': loaded, 'peak_mb': load_peak, 'seconds': load_seconds},
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
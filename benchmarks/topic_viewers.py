@@ -0,0 +1,110 @@
+"""
+Session size and database writes per topic page view, with the view counted
+through a session flag per topic, as PostListView used to, and through the
+per topic HyperLogLog, plus the accuracy of the HyperLogLog estimate.
+
+    python benchmarks/topic_viewers.py [--topics 200] [--passes 3]
+
+One logged in reader opens --topics topics --passes times each, on a
+throwaway copy of the configured database.
+"""
+import argparse
+import json
+import time
+from unittest import mock
+
+from common import setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.sessions.models import Session  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from forum.counters import topic_views  # noqa: E402
+from forum.models import Forum, Topic  # noqa: E402
+from forum.viewers import HyperLogLog  # noqa: E402
+from forum.views import PostListView  # noqa: E402
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def session_record_view(self, topic_pk):
+    """the session flag PostListView.record_view used before"""
+    session_key = f'viewed_topic_{topic_pk}'
+    if self.request.session.get(session_key, False):
+        return 0
+    topic_views.add(topic_pk)
+    self.request.session[session_key] = True
+    return 1
+
+
+class WriteCounter:
+    def __init__(self):
+        self.queries = self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        self.writes += sql.startswith(WRITES)
+        return execute(sql, params, many, context)
+
+
+def read_topics(user, urls, passes):
+    client = Client()
+    client.force_login(user)
+    counter = WriteCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for _ in range(passes):
+            for url in urls:
+                client.get(url)
+    elapsed = time.perf_counter() - started
+    views = passes * len(urls)
+    session = Session.objects.get(session_key=client.session.session_key)
+    return {
+        'session_bytes': len(session.session_data),
+        'queries_per_view': round(counter.queries / views, 2),
+        'db_writes_per_view': round(counter.writes / views, 3),
+        'ms_per_view': round(elapsed / views * 1000, 2),
+    }
+
+
+def accuracy(precision, sizes):
+    results = {}
+    for size in sizes:
+        sketch = HyperLogLog(precision)
+        for i in range(size):
+            sketch.add(f'viewer{i}')
+        results[size] = round((sketch.estimate() - size) / size * 100, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--passes', type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    with temporary_database(), mock.patch.object(settings, 'TOPIC_VIEWS_FLUSH_INTERVAL', 3600):
+        user = User.objects.create_user(username='reader')
+        forum = Forum.objects.create(name='Viewers', description='Viewer benchmark')
+        topics = Topic.objects.bulk_create(
+            Topic(subject=f'Topic {i}', forum=forum, opener=user) for i in range(args.topics))
+        urls = [reverse('topic_posts', kwargs={'pk': forum.pk, 'topic_pk': topic.pk})
+                for topic in topics]
+        with mock.patch.object(PostListView, 'record_view', session_record_view):
+            results['session_flag'] = read_topics(user, urls, args.passes)
+        cache.clear()
+        results['hyperloglog'] = read_topics(user, urls, args.passes)
+        results['hyperloglog']['cache_bytes_per_topic'] = 1 << settings.TOPIC_VIEWERS_PRECISION
+    results['error_pct_by_viewers'] = accuracy(
+        settings.TOPIC_VIEWERS_PRECISION, (100, 1000, 10000, 100000))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Forum
+from .models import Forum, Job
 
 
 admin.site.register(Forum)
+admin.site.register(Job)
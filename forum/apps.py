@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forum'
+
+    def ready(self):
+        from django.conf import settings
+        from django.utils.module_loading import autodiscover_modules
+        from . import checks, counters, metrics, signals  # noqa: F401
+        counters.connect()
+        # registers the @task functions of every app, for the workers
+        autodiscover_modules('tasks')
+        if settings.REQUEST_METRICS:
+            # before any thread opens a connection, so all of them are timed
+            metrics.install()
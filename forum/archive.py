@@ -0,0 +1,96 @@
+"""
+Whole-topic downloads streamed a chunk of posts at a time.
+
+Posts are read in keyset batches of CHUNK_SIZE, each one starting after the
+(created_at, pk) of the last, so however long the topic only one chunk of
+rows and text is held at once, with or without server-side cursors, which
+a transaction-pooling PgBouncer (DATABASE_POOLED) rules out. Under ASGI
+the chunks are produced through sync_to_async, as Django would otherwise
+read a synchronous iterator to the end before sending anything.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.html import format_html
+from .transfer import isoformat
+
+CHUNK_SIZE = 500
+
+
+def archived_posts(topic):
+    """the topic's posts in batches of up to CHUNK_SIZE, oldest first"""
+    # topic is kept, the related manager sets it on every row
+    posts = topic.posts.select_related('created_by').only(
+        'topic', 'message', 'message_html', 'message_hash', 'created_at', 'updated_at',
+        'created_by__username').order_by('created_at', 'pk')
+    batch = list(posts[:CHUNK_SIZE])
+    while batch:
+        yield batch
+        if len(batch) < CHUNK_SIZE:
+            return
+        last = batch[-1]
+        batch = list(posts.filter(
+            Q(created_at__gt=last.created_at) |
+            Q(created_at=last.created_at, pk__gt=last.pk))[:CHUNK_SIZE])
+
+
+def ndjson_line(topic, post):
+    return json.dumps({
+        'id': post.pk,
+        'topic': topic.pk,
+        'author': post.created_by.username,
+        'created_at': post.created_at,
+        'updated_at': post.updated_at,
+        'message': post.message,
+    }, ensure_ascii=False, default=isoformat) + '\n'
+
+
+def html_post(topic, post):
+    return format_html(
+        '<article id="{}"><header><strong>{}</strong> <time datetime="{}">{}</time></header>'
+        '{}</article>\n',
+        post.pk, post.created_by.username, post.created_at.isoformat(),
+        post.created_at.strftime('%Y-%m-%d %H:%M'), post.markdown_message())
+
+
+def html_head(topic):
+    return format_html(
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{}</title></head>'
+        '<body><h1>{}</h1>\n', topic.subject, topic.subject)
+
+
+FORMATS = {
+    # format: (content type, extension, head, post, tail)
+    'ndjson': ('application/x-ndjson', 'ndjson', None, ndjson_line, None),
+    'html': ('text/html; charset=utf-8', 'html', html_head, html_post, '</body></html>\n'),
+}
+
+
+def chunks(topic, format):
+    """the archive as strings of up to CHUNK_SIZE posts"""
+    content_type, extension, head, post, tail = FORMATS[format]
+    if head:
+        yield head(topic)
+    for batch in archived_posts(topic):
+        yield ''.join(post(topic, row) for row in batch)
+    if tail:
+        yield tail
+
+
+async def achunks(iterator):
+    # thread sensitive, so every batch is read on the request's connection
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+def archive_response(request, topic, format):
+    content_type, extension, *renderers = FORMATS[format]
+    content = chunks(topic, format)
+    if isinstance(request, ASGIRequest):
+        content = achunks(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="topic-{topic.pk}.{extension}"'
+    return response
@@ -0,0 +1,67 @@
+"""
+Async variants of the read-only list views, for serving under ASGI.
+
+They subclass the sync views and keep their templates, context, caching and
+conditional GET behaviour; only the queries move to the async ORM, so an
+event loop worker keeps serving other requests while one waits on the
+database. urls.py routes to them when ASYNC_VIEWS is set.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from .caching import aload_user
+from .models import Forum, Topic
+from .views import ForumListView, TopicListView, PostListView
+
+
+class AsyncListMixin:
+    """
+    async get() for ListView subclasses: aget_queryset() and the page are
+    read with the async ORM before get_context_data() runs, so rendering
+    only sees evaluated rows
+    """
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.pagination
+
+    async def get(self, request, *args, **kwargs):
+        # templates read request.user, which may need the session table
+        await aload_user(request)
+        queryset = await self.aget_queryset()
+        page_size = self.get_paginate_by(queryset)
+        if page_size:
+            self.pagination = await self.apaginate_queryset(queryset, page_size)
+            self.object_list = queryset
+        else:
+            self.object_list = [obj async for obj in queryset]
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+
+class AsyncForumListView(AsyncListMixin, ForumListView):
+    """ForumListView for ASGI"""
+
+
+class AsyncTopicListView(AsyncListMixin, TopicListView):
+    """TopicListView for ASGI"""
+
+    async def aget_queryset(self):
+        try:
+            self.forum = await Forum.objects.aget(pk=self.kwargs.get('pk'))
+        except Forum.DoesNotExist:
+            raise Http404('No Forum matches the given query.')
+        return self.get_topics()
+
+
+class AsyncPostListView(AsyncListMixin, PostListView):
+    """PostListView for ASGI, the view is counted in a thread"""
+
+    async def aget_queryset(self):
+        try:
+            self.topic = await self.get_topic_queryset().aget()
+        except Topic.DoesNotExist:
+            raise Http404('No Topic matches the given query.')
+        self.topic.views += await sync_to_async(self.record_view)(self.topic.pk)
+        return self.get_posts()
@@ -0,0 +1,257 @@
+"""
+Whole-page caching of anonymous reads, and conditional GET support.
+
+Every cached page key embeds the current version of each scope the page
+depends on: the forum list ('forums'), one forum's topic list
+('forum', pk) or one topic's posts ('topic', pk). Writes bump only the
+versions they affect, so the stale pages are never read again and simply
+expire. A thread also shows each author's post count and avatar, so a
+change to either bumps every topic the author has posted in.
+"""
+import hashlib
+import time
+from calendar import timegm
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers, quote_etag)
+from django.utils.http import http_date
+from .models import Post
+
+FORUMS = ('forums', 0)
+
+
+def forum_scope(pk):
+    return ('forum', pk)
+
+
+def topic_scope(pk):
+    return ('topic', pk)
+
+
+def author_scopes(user_id):
+    """the topics a user has posted in, each showing their post count and avatar"""
+    topics = Post.objects.filter(created_by_id=user_id).order_by().values_list(
+        'topic_id', flat=True).distinct()
+    return [topic_scope(pk) for pk in topics]
+
+
+def version_key(scope):
+    kind, pk = scope
+    return f'forum:version:{kind}:{pk}'
+
+
+def get_versions(scopes):
+    """
+    current version of each scope; a missing version starts at the current
+    time, so a version that was evicted never comes back with an old value
+    """
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """invalidates every cached page depending on one of the scopes"""
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_on_commit(*scopes):
+    """
+    bump() once the current transaction commits, or now outside one; a
+    reader before the commit caches the old rows under the old version,
+    which the bump then retires, and the cache is not called with the
+    write lock held
+    """
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def page_key(request, scopes, versions=None):
+    if versions is None:
+        versions = get_versions(scopes)
+    versions = '.'.join(str(version) for version in versions)
+    return f'forum:page:{versions}:{request.get_full_path()}'
+
+
+async def aload_user(request):
+    """
+    resolves the lazy request.user, and the session behind it, in a thread;
+    afterwards async code can read both without touching the database
+    """
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+class AnonymousPageCacheMixin:
+    """
+    serves GET requests of anonymous users from the cache for
+    CACHE_PAGE_SECONDS, keyed by the versions of get_cache_scopes()
+    """
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def cache_hit(self, request):
+        """hook run when a response is served from the cache"""
+
+    def cacheable(self, request):
+        return (settings.CACHE_PAGE_SECONDS and request.method == 'GET'
+                and not request.user.is_authenticated)
+
+    def store(self, response, key):
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda rendered: cache.set(
+                key, (rendered.content, rendered['Content-Type']),
+                settings.CACHE_PAGE_SECONDS))
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch_cached(request, *args, **kwargs)
+        if not self.cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_key(request, self.get_cache_scopes())
+        cached = cache.get(key)
+        if cached is not None:
+            self.cache_hit(request)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+            self.store(response, key)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    async def adispatch_cached(self, request, *args, **kwargs):
+        """dispatch() for async views, cache_hit() runs in a thread"""
+        await aload_user(request)
+        if not self.cacheable(request):
+            return await super().dispatch(request, *args, **kwargs)
+
+        scopes = self.get_cache_scopes()
+        key = page_key(request, scopes, await aget_versions(scopes))
+        cached = await cache.aget(key)
+        if cached is not None:
+            await sync_to_async(self.cache_hit)(request)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = await super().dispatch(request, *args, **kwargs)
+            self.store(response, key)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    answers GET/HEAD with 304 Not Modified when the client's ETag or
+    Last-Modified is still current, before the page is rendered;
+    make_freshness() turns the first row of get_freshness_queryset() into
+    (last_modified, version), and a missing row lets the view handle the
+    missing object; the version also takes in the cache versions of
+    get_etag_scopes(), for what the row cannot tell
+    """
+
+    def get_freshness_queryset(self):
+        raise NotImplementedError
+
+    def make_freshness(self, row):
+        raise NotImplementedError
+
+    def get_etag_scopes(self):
+        return []
+
+    def versioned(self, freshness, versions):
+        last_modified, version = freshness
+        return last_modified, ':'.join([version, *map(str, versions)])
+
+    def get_freshness(self):
+        row = self.get_freshness_queryset().first()
+        if row is None:
+            return None
+        scopes = self.get_etag_scopes()
+        return self.versioned(self.make_freshness(row),
+                              get_versions(scopes) if scopes else [])
+
+    async def aget_freshness(self):
+        row = await self.get_freshness_queryset().afirst()
+        if row is None:
+            return None
+        scopes = self.get_etag_scopes()
+        return self.versioned(self.make_freshness(row),
+                              await aget_versions(scopes) if scopes else [])
+
+    def validators(self, request, freshness):
+        last_modified, version = freshness
+        # the page shows who is logged in, so the tag differs per user
+        user_pk = request.user.pk if request.user.is_authenticated else 0
+        tag = f'{version}:{user_pk}:{request.get_full_path()}'
+        etag = quote_etag(hashlib.md5(tag.encode('utf-8')).hexdigest())
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+        return etag, timestamp
+
+    def finalize(self, request, response, etag, timestamp):
+        response.headers.setdefault('ETag', etag)
+        if timestamp is not None:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+        patch_cache_control(response, no_cache=True,
+                            private=request.user.is_authenticated)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch_conditional(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        freshness = self.get_freshness()
+        if freshness is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, timestamp = self.validators(request, freshness)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return self.finalize(request, response, etag, timestamp)
+
+    async def adispatch_conditional(self, request, *args, **kwargs):
+        """dispatch() for async views, reading freshness with the async ORM"""
+        if request.method not in ('GET', 'HEAD'):
+            return await super().dispatch(request, *args, **kwargs)
+        freshness = await self.aget_freshness()
+        if freshness is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        await aload_user(request)
+        etag, timestamp = self.validators(request, freshness)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return self.finalize(request, response, etag, timestamp)
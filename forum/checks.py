@@ -0,0 +1,104 @@
+"""
+Warnings for performance-critical settings left at their development values.
+
+Registered as deploy checks, so `manage.py check --deploy` lists them with
+Django's own security checks. Application servers never run system checks,
+so the WSGI and ASGI entry points log them at startup in the production
+profile through warn_on_startup(), along with the session cache error,
+which every management command reports.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.checks import Error, Tags, Warning, register
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger('forum.checks')
+
+GZIP_MIDDLEWARE = 'django.middleware.gzip.GZipMiddleware'
+DEBUG_PROCESSOR = 'django.template.context_processors.debug'
+HINT = 'Set SETTINGS_PROFILE=production.'
+CACHED_SESSION_ENGINES = ('django.contrib.sessions.backends.cache',
+                          'django.contrib.sessions.backends.cached_db')
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def django_engines():
+    return [engine for engine in engines.all() if isinstance(engine, DjangoTemplates)]
+
+
+@register('performance', deploy=True)
+def performance_settings(app_configs=None, **kwargs):
+    warnings = []
+    if settings.DEBUG:
+        warnings.append(Warning(
+            'DEBUG is on: every SQL query of a request is kept in memory and '
+            'error pages expose settings.', hint=HINT, id='forum.W001'))
+    for engine in django_engines():
+        if not any(isinstance(loader, CachedLoader) for loader in engine.engine.template_loaders):
+            warnings.append(Warning(
+                f'Templates of the {engine.name!r} engine are read and compiled on every '
+                'render, the cached loader is not in use.', hint=HINT, id='forum.W002'))
+        if DEBUG_PROCESSOR in engine.engine.context_processors:
+            warnings.append(Warning(
+                f'The {engine.name!r} engine runs the debug context processor on every '
+                'render.', hint=HINT, id='forum.W003'))
+    if GZIP_MIDDLEWARE not in settings.MIDDLEWARE:
+        warnings.append(Warning(
+            'Responses are sent uncompressed, GZipMiddleware is not installed.',
+            hint=HINT, id='forum.W004'))
+    if not isinstance(staticfiles_storage, ManifestFilesMixin):
+        warnings.append(Warning(
+            'Static file names carry no content hash, so browsers cannot cache '
+            'them for long.', hint=HINT, id='forum.W005'))
+    if not settings.DATABASES['default'].get('CONN_MAX_AGE'):
+        warnings.append(Warning(
+            'CONN_MAX_AGE is 0: every request opens a new database connection.',
+            hint='Set CONN_MAX_AGE to the seconds a connection may be reused.',
+            id='forum.W006'))
+    if settings.QUERY_DETECTOR != 'off':
+        warnings.append(Warning(
+            'QUERY_DETECTOR fingerprints and traces every SQL query.',
+            hint='Set QUERY_DETECTOR=off.', id='forum.W007'))
+    if settings.CACHE_BACKEND == 'locmem':
+        warnings.append(Warning(
+            'The cache is per process: each worker caches pages and counts topic '
+            'viewers on its own.',
+            hint='Set CACHE_BACKEND=redis and CACHE_LOCATION=redis://host:6379, or '
+                 'CACHE_BACKEND=file on a single host.', id='forum.W008'))
+    if not settings.CACHE_PAGE_SECONDS:
+        warnings.append(Warning(
+            'CACHE_PAGE_SECONDS is 0: pages are rendered for every anonymous visitor.',
+            hint='Set CACHE_PAGE_SECONDS.', id='forum.W009'))
+    return warnings
+
+
+@register(Tags.caches)
+def session_cache(app_configs=None, **kwargs):
+    """
+    sessions read from a per process cache outlive a logout served by another
+    process, which only deletes its own copy; a single process, such as
+    runserver, has only the one copy
+    """
+    cache = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {})
+    if (settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and cache.get('BACKEND') == LOCMEM_CACHE
+            and settings.WEB_CONCURRENCY > 1):
+        return [Error(
+            f'SESSION_BACKEND {settings.SESSION_ENGINE.rsplit(".", 1)[1]} keeps sessions in '
+            f'the per process locmem cache of each of the {settings.WEB_CONCURRENCY} '
+            'workers: a user logged out by one worker stays logged in on the others.',
+            hint='Set CACHE_BACKEND=redis, or SESSION_BACKEND=db.', id='forum.E001')]
+    return []
+
+
+def warn_on_startup():
+    """logs the performance warnings and errors when a production server starts"""
+    if settings.SETTINGS_PROFILE != 'production':
+        return
+    for error in session_cache():
+        logger.error('%s', error)
+    for warning in performance_settings():
+        logger.warning('%s', warning)
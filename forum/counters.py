@@ -0,0 +1,103 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection
+from django.db.models import F
+
+logger = logging.getLogger('forum.counters')
+
+
+class TopicViewBuffer:
+    """
+    accumulates topic view increments in process memory and writes them as
+    UPDATE ... SET views = views + n, at most TOPIC_VIEWS_FLUSH_INTERVAL
+    seconds after they were recorded: after a request, or from the timer
+    servers start when nothing else is served, and once more when the
+    process exits. Views recorded since the last flush are lost if the
+    process is killed outright
+    """
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def add(self, topic_pk, count=1):
+        """records count views of a topic"""
+        with self._lock:
+            self._pending[topic_pk] += count
+        self.flush_if_due()
+
+    def pending(self, topic_pk):
+        """views of a topic recorded but not yet written"""
+        return self._pending.get(topic_pk, 0)
+
+    def discard(self):
+        """drops the pending views unwritten, returns how many there were"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        return sum(pending.values())
+
+    def flush_if_due(self, **kwargs):
+        interval = settings.TOPIC_VIEWS_FLUSH_INTERVAL
+        if self._pending and time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """
+        writes every pending increment, one UPDATE per distinct amount; on a
+        database error they are kept for the next flush and the error logged,
+        as it would otherwise fail whichever request happened to flush
+        """
+        from .models import Topic
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        by_amount = defaultdict(list)
+        for topic_pk, count in pending.items():
+            by_amount[count].append(topic_pk)
+        try:
+            for count, topic_pks in by_amount.items():
+                Topic.objects.filter(pk__in=topic_pks).update(
+                    views=F('views') + count)
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+            logger.exception('Writing %d topic views failed', sum(pending.values()))
+            return 0
+        return sum(pending.values())
+
+    def start_timer(self):
+        """flushes due views from a background thread, for idle servers"""
+        if self._timer is None:
+            self._timer = threading.Thread(
+                target=self._flush_periodically, name='topic-views-flush', daemon=True)
+            self._timer.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(max(settings.TOPIC_VIEWS_FLUSH_INTERVAL, 1))
+            try:
+                self.flush_if_due()
+            finally:
+                # the thread's own connection, never reused by requests
+                connection.close()
+
+
+topic_views = TopicViewBuffer()
+
+
+def connect():
+    """flushes due views after each request and what is left at shutdown"""
+    request_finished.connect(topic_views.flush_if_due,
+                             dispatch_uid='forum.counters.flush_if_due')
+    atexit.register(topic_views.flush)
@@ -0,0 +1,163 @@
+"""
+Background jobs kept in the database and run by `manage.py run_jobs`.
+
+A task is a function registered with @task, found in the tasks module of
+any installed app. task.delay(**kwargs) inserts a Job row in the caller's
+transaction, so the request pays for one INSERT instead of the work, and
+the job only becomes visible to workers once that transaction commits.
+
+Workers claim due jobs a batch at a time by stamping them with a lease,
+with SKIP LOCKED where the database has it, and on SQLite with a single
+UPDATE, which takes the write lock before reading; the lease of the jobs
+left in a batch is renewed as each one starts, and a job whose worker died
+is claimed again once its lease runs out. A failing job is retried with a
+delay doubling from JOBS_RETRY_DELAY, until its task's max_attempts, and
+then kept with failed_at set. Jobs run at least once, so tasks must be
+safe to repeat, and their arguments must be JSON.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (DatabaseError, close_old_connections, connection, reset_queries,
+                       transaction)
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('forum.jobs')
+
+TASKS = {}
+
+
+class Task:
+    def __init__(self, function, max_attempts):
+        self.function = function
+        self.name = f'{function.__module__}.{function.__name__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.function(**kwargs)
+
+    def delay(self, **kwargs):
+        """queues a call with these keyword arguments"""
+        return Job.objects.create(task=self.name, kwargs=kwargs)
+
+
+def task(function=None, *, max_attempts=None):
+    """registers a function as a task, usable as @task or @task(max_attempts=3)"""
+    def register(function):
+        registered = Task(function, max_attempts or settings.JOBS_MAX_ATTEMPTS)
+        TASKS[registered.name] = registered
+        return registered
+    return register(function) if function else register
+
+
+def claimable(now):
+    return Job.objects.filter(failed_at__isnull=True, run_at__lte=now).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+
+
+def lease_end():
+    return timezone.now() + timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+
+
+def claim(worker, batch_size):
+    """leases up to batch_size due jobs to this worker, oldest first"""
+    now = timezone.now()
+    lease = lease_end()
+    due = claimable(now).order_by('run_at', 'pk')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(due.select_for_update(skip_locked=True)
+                       .values_list('pk', flat=True)[:batch_size])
+            # filtered again, so of two workers that read the same rows only
+            # one gets each
+            claimable(now).filter(pk__in=pks).update(
+                locked_by=worker, locked_until=lease, attempts=F('attempts') + 1)
+    else:
+        # one UPDATE ... WHERE id IN (SELECT ... LIMIT): a transaction that
+        # read first could not upgrade to the write lock another worker took
+        # meanwhile, and would fail with "database is locked" at once
+        claimable(now).filter(pk__in=due.values('pk')[:batch_size]).update(
+            locked_by=worker, locked_until=lease, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(locked_by=worker, locked_until=lease)
+                .order_by('run_at', 'pk'))
+
+
+def renew(worker, pks):
+    """extends the lease of the jobs this worker still holds, returns their pks"""
+    updated = Job.objects.filter(pk__in=pks, locked_by=worker).update(locked_until=lease_end())
+    if updated == len(pks):
+        return set(pks)
+    return set(Job.objects.filter(pk__in=pks, locked_by=worker).values_list('pk', flat=True))
+
+
+def retry(job, error):
+    """schedules the next attempt of a failed job, or gives up on it"""
+    registered = TASKS.get(job.task)
+    update = {'last_error': error, 'locked_by': '', 'locked_until': None}
+    if registered is None or job.attempts >= registered.max_attempts:
+        update['failed_at'] = timezone.now()
+        logger.error('Job %s failed after %d attempts:\n%s', job, job.attempts, error)
+    else:
+        delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        update['run_at'] = timezone.now() + timedelta(seconds=delay)
+        logger.warning('Job %s failed, retrying in %ds:\n%s', job, delay, error)
+    # a job whose lease ran out may be another worker's by now
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**update)
+
+
+def run_batch(worker, batch_size):
+    """runs one batch of due jobs, returns how many there were"""
+    jobs = claim(worker, batch_size)
+    done = []
+    for index, job in enumerate(jobs):
+        # the batch was leased when claimed; the jobs left, and the finished
+        # ones until they are deleted, get a fresh lease as each job starts
+        if index and job.pk not in renew(worker, done + [left.pk for left in jobs[index:]]):
+            logger.warning('Job %s lost its lease before it started, skipped', job)
+            continue
+        try:
+            TASKS[job.task](**job.kwargs)
+        except Exception:
+            retry(job, traceback.format_exc())
+        else:
+            done.append(job.pk)
+    Job.objects.filter(pk__in=done, locked_by=worker).delete()
+    return len(jobs)
+
+
+def work(batch_size=10, poll_interval=1.0, burst=False, stopping=lambda: False):
+    """
+    runs due jobs until stopping() is true, or with burst until none are
+    left, returns how many were run
+    """
+    worker = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    ran = 0
+    while not stopping():
+        if not connection.in_atomic_block:
+            # drops connections past CONN_MAX_AGE or broken, as requests do
+            close_old_connections()
+        try:
+            count = run_batch(worker, batch_size)
+        except DatabaseError:
+            # e.g. "database is locked" or a dropped connection, which the
+            # next round reconnects after; claimed jobs are kept by their lease
+            logger.exception('Worker %s could not claim or finish jobs', worker)
+            time.sleep(poll_interval)
+            continue
+        ran += count
+        # DEBUG would keep every query of a long-running worker
+        reset_queries()
+        if not count:
+            if burst:
+                break
+            time.sleep(poll_interval)
+    return ran
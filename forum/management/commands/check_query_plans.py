@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from forum.queryplans import check
+
+
+class Command(BaseCommand):
+    help = ('Runs EXPLAIN on the hot forum queries and fails if any of them scans '
+            'a whole table or sorts in a temporary structure')
+
+    def handle(self, *args, **options):
+        try:
+            results = check()
+        except NotImplementedError as e:
+            raise CommandError(e)
+        failed = []
+        for name, plan, problems in results:
+            if problems:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: {", ".join(problems)}'))
+            else:
+                self.stdout.write(f'{name}: ok')
+            if problems or options['verbosity'] > 1:
+                self.stdout.write(f'{plan}\n')
+        if failed:
+            raise CommandError(f'{len(failed)} hot query plan(s) are not served by an index: '
+                               f'{", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'All {len(results)} hot query plans are served by indexes'))
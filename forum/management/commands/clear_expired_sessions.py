@@ -0,0 +1,38 @@
+import time
+from importlib import import_module
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseStore
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Deletes expired sessions from the database in batches, so no single DELETE '
+            'holds the table for long; cache and cookie sessions expire on their own')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='sessions deleted per query')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not issubclass(store, DatabaseStore):
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no sessions in the database')
+            return
+
+        model = store.get_model_class()
+        # expire_date is indexed, so each batch is found without a scan
+        expired = model.objects.filter(expire_date__lt=timezone.now()).order_by('expire_date')
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += model.objects.filter(pk__in=keys).delete()[0]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{deleted} expired sessions deleted')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions'))
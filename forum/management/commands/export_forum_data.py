@@ -0,0 +1,52 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from forum.transfer import RECORDS, columns, dump, open_file
+
+
+class Command(BaseCommand):
+    help = ('Streams every user, forum, topic and post as NDJSON, one record per line, '
+            'for import_forum_data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='file to write, gzip compressed if it ends in .gz; '
+                                 'standard output by default')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        # progress goes to stderr so it never mixes with records on stdout
+        to_stdout = options['output'] == '-'
+        output = sys.stdout if to_stdout else open_file(options['output'], 'w')
+        started = time.monotonic()
+        written = 0
+        try:
+            for type, (model, fields) in RECORDS.items():
+                for row in self.rows(model, fields, options['batch_size']):
+                    output.write(dump(type, fields, row))
+                    output.write('\n')
+                    written += 1
+                    if written % 100000 == 0:
+                        self.progress(written, started)
+        finally:
+            if not to_stdout:
+                output.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {written} records in {elapsed:.1f}s '
+            f'({written / max(elapsed, 1e-9):.0f}/s)'))
+
+    def rows(self, model, fields, batch_size):
+        # keyset batches rather than iterator(), which only bounds memory with
+        # server-side cursors, and those are off behind PgBouncer
+        rows = model.objects.order_by('pk').values_list('pk', *columns(model, fields))
+        last_pk = 0
+        while batch := list(rows.filter(pk__gt=last_pk)[:batch_size]):
+            for pk, *row in batch:
+                yield row
+            last_pk = batch[-1][0]
+
+    def progress(self, written, started):
+        rate = written / max(time.monotonic() - started, 1e-9)
+        self.stderr.write(f'{written} records exported, {rate:.0f}/s')
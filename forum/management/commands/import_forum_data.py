@@ -0,0 +1,101 @@
+import json
+import sys
+import time
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, reset_queries, transaction
+from forum.caching import FORUMS, bump
+from forum.transfer import RECORDS, load, open_file, timestamps_kept
+
+
+class Command(BaseCommand):
+    help = ('Loads users, forums, topics and posts from the NDJSON written by '
+            'export_forum_data, in batches, keeping their primary keys')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default='-',
+                            help='file to read, gzip compressed if it ends in .gz; '
+                                 'standard input by default')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='records of one type inserted per query')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.pending = {type: [] for type in RECORDS}
+        self.first_line = dict.fromkeys(RECORDS)
+        self.imported = dict.fromkeys(RECORDS, 0)
+        self.started = time.monotonic()
+        source = sys.stdin if options['input'] == '-' else open_file(options['input'], 'r')
+
+        # memory holds at most one batch per type, however long the file is
+        with source, timestamps_kept():
+            for line_number, line in enumerate(source, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    instance = load(data)
+                except (ValueError, KeyError, TypeError) as e:
+                    raise CommandError(f'Line {line_number}: invalid record ({e!r})')
+                batch = self.pending[data['type']]
+                if not batch:
+                    self.first_line[data['type']] = line_number
+                batch.append(instance)
+                if len(batch) >= self.batch_size:
+                    self.flush(data['type'])
+            for type in RECORDS:
+                self.flush(type)
+
+        self.reset_sequences()
+        total = sum(self.imported.values())
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} records in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f}/s): '
+            + ', '.join(f'{count} {type}s' for type, count in self.imported.items())))
+
+        # bulk_create skips the signals, so the HTML, counters and index are
+        # brought up to date once for the whole import
+        output = self.stdout if options['verbosity'] > 1 else StringIO()
+        for command in ('render_post_markdown', 'rebuild_forum_stats', 'rebuild_search_index'):
+            started = time.monotonic()
+            call_command(command, stdout=output)
+            self.stdout.write(f'{command} took {time.monotonic() - started:.1f}s')
+        bump(FORUMS)
+
+    def flush(self, type):
+        """inserts the batch of a type, after the batches of the types it references"""
+        for parent in RECORDS:
+            if parent == type:
+                break
+            if self.pending[parent]:
+                self.flush(parent)
+        batch = self.pending[type]
+        if not batch:
+            return
+        model = RECORDS[type][0]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        except DatabaseError as e:
+            raise CommandError(
+                f'Line {self.first_line[type]}: inserting {len(batch)} {type}s from there '
+                f'failed ({e}); {sum(self.imported.values())} earlier records were imported')
+        # with DEBUG on, each batch's SQL would otherwise pile up in connection.queries
+        reset_queries()
+        before = sum(self.imported.values())
+        self.imported[type] += len(batch)
+        self.pending[type] = []
+        total = before + len(batch)
+        if total // 100000 > before // 100000:
+            rate = total / max(time.monotonic() - self.started, 1e-9)
+            self.stdout.write(f'{total} records imported, {rate:.0f}/s')
+
+    def reset_sequences(self):
+        """moves the id sequences past the imported keys, where the database has them"""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [model for model, fields in RECORDS.values()])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
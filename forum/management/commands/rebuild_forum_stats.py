@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from accounts.models import Profile
+from forum.models import Forum, Post
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the denormalized topic/post counters and last post of every forum, '
+            'and the post count of every user profile')
+
+    def add_arguments(self, parser):
+        parser.add_argument('forum_ids', nargs='*', type=int,
+                            help='only rebuild these forums, skipping user profiles')
+
+    def handle(self, *args, **options):
+        forums = Forum.objects.all()
+        if options['forum_ids']:
+            forums = forums.filter(pk__in=options['forum_ids'])
+        updated = forums.rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt statistics for {updated} forum(s)'))
+        if options['forum_ids']:
+            return
+
+        missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+        Profile.objects.bulk_create(
+            (Profile(user_id=pk) for pk in missing.iterator()), batch_size=1000)
+        posts = Post.objects.filter(created_by=OuterRef('user')).order_by().values(
+            'created_by').annotate(total=Count('pk')).values('total')
+        updated = Profile.objects.update(post_count=Coalesce(Subquery(posts), 0))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt post counts for {updated} profile(s)'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from forum.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index of topics and posts from scratch'
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from forum.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Renders and stores the markdown HTML of posts whose cached copy is missing or stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of posts loaded and updated per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.only(
+            'pk', 'message', 'message_html', 'message_hash').order_by('pk')
+        last_pk = 0
+        checked = rendered = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            stale = [post for post in batch if post.render_message()]
+            Post.objects.bulk_update(stale, ['message_html', 'message_hash'])
+            last_pk = batch[-1].pk
+            checked += len(batch)
+            rendered += len(stale)
+            self.stdout.write(f'{checked} posts checked, {rendered} rendered')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} of {checked} posts'))
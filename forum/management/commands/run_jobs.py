@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from django.db import connections
+from forum import jobs
+
+
+class Command(BaseCommand):
+    help = ('Runs queued background jobs, such as password reset emails, until stopped; '
+            'SIGTERM and SIGINT let every worker finish its batch first, and workers '
+            'that exit otherwise are restarted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='worker processes to run')
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help='jobs each worker claims at once')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='seconds an idle worker waits before looking again')
+        parser.add_argument('--burst', action='store_true',
+                            help='exit once no jobs are due')
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        handlers = {signum: signal.signal(signum, lambda signum, frame: stopping.set())
+                    for signum in (signal.SIGTERM, signal.SIGINT)}
+        work = dict(batch_size=options['batch_size'], poll_interval=options['poll_interval'],
+                    burst=options['burst'], stopping=stopping.is_set)
+        try:
+            if options['workers'] == 1:
+                ran = jobs.work(**work)
+                self.stdout.write(self.style.SUCCESS(f'Ran {ran} jobs'))
+            else:
+                self.run_workers(options['workers'], work, stopping)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def run_workers(self, count, work, stopping):
+        context = multiprocessing.get_context('fork')
+
+        def start():
+            # each forked worker opens connections of its own
+            connections.close_all()
+            process = context.Process(target=jobs.work, kwargs=work)
+            process.start()
+            return process
+
+        processes = [start() for _ in range(count)]
+        stopped = False
+        while processes:
+            if stopping.is_set() and not stopped:
+                for process in processes:
+                    process.terminate()
+                stopped = True
+            for process in list(processes):
+                process.join(timeout=0.5)
+                if process.is_alive():
+                    continue
+                processes.remove(process)
+                if process.exitcode and not stopping.is_set():
+                    # crashed, or killed from outside: the pool is kept full;
+                    # with --burst a worker exits 0 once no jobs are due
+                    self.stderr.write(f'Worker {process.pid} exited with code '
+                                      f'{process.exitcode}, starting another')
+                    processes.append(start())
+        self.stdout.write(self.style.SUCCESS(f'{count} workers stopped'))
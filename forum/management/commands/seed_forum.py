@@ -0,0 +1,130 @@
+import random
+from datetime import timedelta
+from io import StringIO
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from forum.models import Forum, Topic, Post
+from forum.transfer import timestamps_kept
+
+WORDS = ('forum thread reply post topic django python query index cache page '
+         'latency server request database user profile search markdown lock '
+         'the a of to and in is it that for on with as this was but be').split()
+
+
+def zipf_weights(n, exponent=1.1):
+    """weights of n ranks where the k-th is 1/k**exponent as likely as the first"""
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+def spread(total, weights, minimum, rng):
+    """splits total into len(weights) parts proportional to the weights"""
+    share = total - minimum * len(weights)
+    if share < 0:
+        raise CommandError(f'{total} is too few for {len(weights)} x {minimum}')
+    scale = share / sum(weights)
+    parts = [minimum + int(weight * scale) for weight in weights]
+    for i in rng.sample(range(len(parts)), total - sum(parts)):
+        parts[i] += 1
+    return parts
+
+
+def message(rng):
+    words = rng.choices(WORDS, k=min(int(rng.lognormvariate(3, 0.6)) + 3, 60))
+    text = ' '.join(words).capitalize() + '.'
+    if rng.random() < 0.2:
+        text = f'**{words[0]}** {text}'
+    if rng.random() < 0.1:
+        text += '\n\n- ' + '\n- '.join(words[:3])
+    return text
+
+
+class Command(BaseCommand):
+    help = ('Fills an empty database with forums, topics, posts and users, skewed like a '
+            'real forum: a few forums, threads and users account for most of the posts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forums', type=int, default=10)
+        parser.add_argument('--topics', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=50000,
+                            help='posts in total, including the opening post of every topic')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='the posts are spread over this many past days')
+        parser.add_argument('--password', default='password',
+                            help='password of every generated user')
+        parser.add_argument('--seed', type=int, default=0, help='random seed')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        if options['forums'] < 1 or options['topics'] < options['forums']:
+            raise CommandError('Every forum needs at least one topic')
+        usernames = [f'user{i}' for i in range(options['users'])]
+        if User.objects.filter(username__in=usernames[:1]).exists() or Forum.objects.exists():
+            raise CommandError('The database already has forum data, seed an empty one')
+
+        with transaction.atomic(), timestamps_kept():
+            password = make_password(options['password'])
+            users = User.objects.bulk_create(
+                (User(username=name, email=f'{name}@example.com', password=password)
+                 for name in usernames), batch_size=batch_size)
+            # a handful of regulars write most posts
+            author_weights = list(zip(users, zipf_weights(len(users))))
+            rng.shuffle(author_weights)
+            authors, author_weights = zip(*author_weights)
+            author_weights = list(accumulate(author_weights))
+
+            forums = Forum.objects.bulk_create(
+                Forum(name=f'Forum {i}', description=f'Benchmark forum {i}')
+                for i in range(options['forums']))
+            topic_counts = spread(options['topics'], zipf_weights(len(forums)), 1, rng)
+            thread_lengths = spread(
+                options['posts'],
+                [rng.paretovariate(1.2) for _ in range(options['topics'])], 1, rng)
+
+            now = timezone.now()
+            start = now - timedelta(days=options['days'])
+            topics, threads = [], []
+            for forum, count in zip(forums, topic_counts):
+                for _ in range(count):
+                    length = thread_lengths[len(topics)]
+                    opened = start + (now - start) * rng.random() ** 0.5
+                    times = sorted(opened + (now - opened) * rng.random() ** 3
+                                   for _ in range(length - 1))
+                    times.insert(0, opened)
+                    opener = rng.choices(authors, cum_weights=author_weights)[0]
+                    topic = Topic(subject=' '.join(rng.choices(WORDS, k=5)).capitalize(),
+                                  forum=forum, opener=opener, last_updated=times[-1])
+                    topics.append(topic)
+                    threads.append(times)
+            Topic.objects.bulk_create(topics, batch_size=batch_size)
+
+            posts = 0
+            batch = []
+            for topic, times in zip(topics, threads):
+                posters = rng.choices(authors, cum_weights=author_weights, k=len(times) - 1)
+                for created_at, author in zip(times, [topic.opener, *posters]):
+                    post = Post(message=message(rng), topic=topic,
+                                created_by=author, created_at=created_at)
+                    post.render_message()
+                    batch.append(post)
+                if len(batch) >= batch_size:
+                    Post.objects.bulk_create(batch)
+                    posts += len(batch)
+                    batch = []
+            Post.objects.bulk_create(batch)
+            posts += len(batch)
+
+        # bulk_create skips the signals, so the counters and index are rebuilt
+        output = self.stdout if options['verbosity'] > 1 else StringIO()
+        call_command('rebuild_forum_stats', stdout=output)
+        call_command('rebuild_search_index', stdout=output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(forums)} forums, {len(topics)} topics, {posts} posts '
+            f'and {len(users)} users'))
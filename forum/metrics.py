@@ -0,0 +1,194 @@
+"""
+Per-request SQL, template and total timings, enabled with REQUEST_METRICS.
+
+MetricsMiddleware is only added to MIDDLEWARE, and the query and template
+hooks below only installed, when the setting is on, so a disabled process
+runs none of this code. Each request's timings are sent back in a
+Server-Timing header and added to in-process histograms labelled by URL
+name, which the metrics view renders in the Prometheus text format.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.base import Template
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# the recorder of the request being served, copied into sync_to_async threads
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """what one request spent on SQL and templates"""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+
+class Histogram:
+    """cumulative buckets, sum and count for each label value"""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((label, counts[:], total, count)
+                            for label, (counts, total, count) in self._series.items())
+        for label, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {count}')
+        return '\n'.join(lines)
+
+
+HISTOGRAMS = {
+    'total': Histogram('forum_request_duration_seconds',
+                       'Time spent serving the request.', DURATION_BUCKETS),
+    'sql': Histogram('forum_request_sql_duration_seconds',
+                     'Time spent in SQL queries per request.', DURATION_BUCKETS),
+    'template': Histogram('forum_request_template_duration_seconds',
+                          'Time spent rendering templates per request.', DURATION_BUCKETS),
+    'queries': Histogram('forum_request_sql_queries',
+                         'SQL queries run per request.', QUERY_BUCKETS),
+}
+
+
+def reset():
+    for histogram in HISTOGRAMS.values():
+        histogram.reset()
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - started
+        metrics.sql_count += 1
+
+
+def add_query_wrapper(sender, connection, **kwargs):
+    # first in the list, so the outermost wrapper, as connection.execute_wrapper()
+    # pops whatever is last; the SQL time thus includes the wrappers inside it,
+    # such as the query detector's stack walk when QUERY_DETECTOR is on
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def timed_render(render):
+    """times the outermost template render, includes are part of it"""
+
+    def wrapper(self, context):
+        metrics = _current.get()
+        if metrics is None or metrics.rendering:
+            return render(self, context)
+        metrics.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+            metrics.rendering = False
+
+    wrapper.timed = True
+    return wrapper
+
+
+def install():
+    """hooks query and template timing in, once per process"""
+    connection_created.connect(add_query_wrapper, dispatch_uid='forum.metrics.queries')
+    # connections this thread already opened missed the signal
+    for connection in connections.all(initialized_only=True):
+        add_query_wrapper(None, connection)
+    if not getattr(Template.render, 'timed', False):
+        Template.render = timed_render(Template.render)
+
+
+class MetricsMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def finish(self, request, response, metrics, total):
+        match = getattr(request, 'resolver_match', None)
+        view = (match and match.url_name) or 'unmatched'
+        HISTOGRAMS['total'].observe(view, total)
+        HISTOGRAMS['sql'].observe(view, metrics.sql_time)
+        HISTOGRAMS['template'].observe(view, metrics.template_time)
+        HISTOGRAMS['queries'].observe(view, metrics.sql_count)
+        response['Server-Timing'] = (
+            f'sql;dur={metrics.sql_time * 1000:.2f};desc="{metrics.sql_count} queries", '
+            f'tpl;dur={metrics.template_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}')
+        return response
+
+
+def metrics(request):
+    """the histograms of this process in the Prometheus text format"""
+    body = '\n'.join(histogram.render() for histogram in HISTOGRAMS.values()) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
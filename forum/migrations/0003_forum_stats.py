@@ -0,0 +1,49 @@
+# Generated by Django 4.2.2 on 2026-10-18 16:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_forum_stats(apps, schema_editor):
+    Forum = apps.get_model('forum', 'Forum')
+    Topic = apps.get_model('forum', 'Topic')
+    Post = apps.get_model('forum', 'Post')
+    topics = Topic.objects.filter(forum=OuterRef('pk')).order_by().values(
+        'forum').annotate(total=Count('pk')).values('total')
+    posts = Post.objects.filter(topic__forum=OuterRef('pk')).order_by().values(
+        'topic__forum').annotate(total=Count('pk')).values('total')
+    last_post = Post.objects.filter(topic__forum=OuterRef('pk')).order_by(
+        '-created_at', '-pk').values('pk')[:1]
+    Forum.objects.update(
+        topic_count=Coalesce(Subquery(topics), 0),
+        post_count=Coalesce(Subquery(posts), 0),
+        last_post=Subquery(last_post),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_topic_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forum',
+            name='last_post',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forum.post'),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='topic_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_forum_stats, migrations.RunPython.noop),
+    ]
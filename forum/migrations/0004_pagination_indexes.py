@@ -0,0 +1,21 @@
+# Generated by Django 4.2.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_forum_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', 'created_at', 'id'], name='post_topic_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['forum', '-last_updated', '-id'], name='topic_forum_last_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-18 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='message_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='message_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE forum_topic_fts USING fts5(subject)',
+    'CREATE VIRTUAL TABLE forum_post_fts USING fts5(message)',
+    'INSERT INTO forum_topic_fts (rowid, subject) SELECT id, subject FROM forum_topic',
+    'INSERT INTO forum_post_fts (rowid, message) SELECT id, message FROM forum_post',
+]
+SQLITE_BACKWARD = [
+    'DROP TABLE forum_topic_fts',
+    'DROP TABLE forum_post_fts',
+]
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX forum_topic_subject_fts_idx ON forum_topic "
+    "USING GIN (to_tsvector('english', subject))",
+    "CREATE INDEX forum_post_message_fts_idx ON forum_post "
+    "USING GIN (to_tsvector('english', message))",
+]
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX forum_topic_subject_fts_idx',
+    'DROP INDEX forum_post_message_fts_idx',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_post_message_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', 'updated_at'], name='post_topic_updated_at_idx'),
+        ),
+    ]
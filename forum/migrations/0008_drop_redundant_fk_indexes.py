@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-18 17:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0007_post_topic_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='topic',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='posts', to='forum.topic'),
+        ),
+        migrations.AlterField(
+            model_name='topic',
+            name='forum',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='topics', to='forum.forum'),
+        ),
+    ]
@@ -1,15 +1,54 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import Truncator
 from django.utils.html import mark_safe
 from markdown import markdown
+import hashlib
 import math
 
+# bump whenever the markdown rendering changes so stored HTML is re-rendered
+MARKDOWN_RENDER_VERSION = 1
+
+
+class ForumQuerySet(models.QuerySet):
+    """queryset for forums, adds maintenance of the denormalized statistics"""
+
+    def rebuild_stats(self):
+        """recomputes topic_count, post_count and last_post in a single UPDATE"""
+        topics = Topic.objects.filter(forum=OuterRef('pk')).order_by().values(
+            'forum').annotate(total=Count('pk')).values('total')
+        posts = Post.objects.filter(topic__forum=OuterRef('pk')).order_by().values(
+            'topic__forum').annotate(total=Count('pk')).values('total')
+        return self.update(
+            topic_count=Coalesce(Subquery(topics), 0),
+            post_count=Coalesce(Subquery(posts), 0),
+            last_post=self._last_post_subquery(),
+        )
+
+    def rebuild_last_post(self):
+        """recomputes only last_post, leaving the counters untouched"""
+        return self.update(last_post=self._last_post_subquery())
+
+    def _last_post_subquery(self):
+        return Subquery(Post.objects.filter(topic__forum=OuterRef('pk')).order_by(
+            '-created_at', '-pk').values('pk')[:1])
+
 
 class Forum(models.Model):
     """Forum/Board class representing the name and description"""
     name = models.CharField(max_length=24, unique=True)
     description = models.CharField(max_length=100)
+    topic_count = models.PositiveIntegerField(default=0, editable=False)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    last_post = models.ForeignKey(
+        'Post', null=True, blank=True, editable=False, related_name='+',
+        on_delete=models.SET_NULL)
+
+    objects = ForumQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -19,44 +58,113 @@ class Forum(models.Model):
         return Post.objects.filter(topic__forum=self).count()
 
     def get_most_previous_post(self):
-        """returns the last post"""
-        return Post.objects.filter(topic__forum=self).order_by('-created_at').first()
+        """returns the last post, kept current by the forum.signals receivers"""
+        return self.last_post
 
 
 class Topic(models.Model):
     """class representing topic under a forum"""
     subject = models.CharField(max_length=255)
     last_updated = models.DateTimeField(auto_now_add=True)
+    # topic_forum_last_updated_idx leads with forum, so no separate index
     forum = models.ForeignKey(
-        Forum, related_name='topics', on_delete=models.CASCADE)
+        Forum, related_name='topics', on_delete=models.CASCADE, db_index=False)
     opener = models.ForeignKey(
         User, related_name='topics', on_delete=models.CASCADE)
     views = models.PositiveBigIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # backs TopicListView ordering and its keyset pagination
+            models.Index(fields=['forum', '-last_updated', '-id'],
+                         name='topic_forum_last_updated_idx'),
+        ]
+
     def __str__(self):
         return self.subject
 
     def get_page_count(self):
         count = self.posts.count()
-        pages = count / 20
+        pages = count / settings.POSTS_PER_PAGE
         return math.ceil(pages)
 
 
 class Post(models.Model):
     """class representing a post on the forum"""
     message = models.TextField(max_length=400)
+    # post_topic_created_at_idx leads with topic, so no separate index
     topic = models.ForeignKey(
-        Topic, related_name='posts', on_delete=models.CASCADE)
+        Topic, related_name='posts', on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True)
     created_by = models.ForeignKey(
         User, related_name='posts', on_delete=models.CASCADE)
     updated_by = models.ForeignKey(
         User, null=True, related_name='+', on_delete=models.CASCADE)
+    message_html = models.TextField(blank=True, editable=False)
+    message_hash = models.CharField(max_length=40, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # backs PostListView ordering and its keyset pagination
+            models.Index(fields=['topic', 'created_at', 'id'],
+                         name='post_topic_created_at_idx'),
+            # latest edit of a topic, for PostListView's conditional GET
+            models.Index(fields=['topic', 'updated_at'],
+                         name='post_topic_updated_at_idx'),
+        ]
 
     def __str__(self):
         short_message = Truncator(self.message)
         return short_message.chars(30)
 
+    def save(self, *args, **kwargs):
+        if self.render_message():
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'message' in update_fields:
+                kwargs['update_fields'] = {
+                    *update_fields, 'message_html', 'message_hash'}
+        super().save(*args, **kwargs)
+
+    def get_message_hash(self):
+        """hash of the message and renderer version the stored HTML belongs to"""
+        content = f'{MARKDOWN_RENDER_VERSION}:{self.message}'.encode('utf-8')
+        return hashlib.sha1(content).hexdigest()
+
+    def render_message(self):
+        """re-renders message_html if it is stale, returns whether it was"""
+        message_hash = self.get_message_hash()
+        if self.message_hash == message_hash:
+            return False
+        self.message_html = markdown(self.message, safe_mode='escape')
+        self.message_hash = message_hash
+        return True
+
     def markdown_message(self):
-        return mark_safe(markdown(self.message, safe_mode='escape'))
+        self.render_message()
+        return mark_safe(self.message_html)
+
+
+class Job(models.Model):
+    """a queued call of a task in forum.jobs, deleted once it has run"""
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    # the worker running the job, and until when others must leave it alone
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # set once every attempt has failed, the job is then kept for inspection
+    failed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # the due jobs workers poll for, failed ones left out
+            models.Index(fields=['run_at'], condition=models.Q(failed_at__isnull=True),
+                         name='job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,192 @@
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+
+
+class CursorPage:
+    """a single page of results returned by CursorPaginator"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        """token for the page following this one, None on the last page"""
+        if not self._has_next:
+            return None
+        return self.paginator.encode(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        """token for the page preceding this one, None on the first page"""
+        if not self._has_previous:
+            return None
+        return self.paginator.encode(self.object_list[0], 'previous')
+
+
+class CursorPaginator:
+    """
+    keyset paginator ordering on (field, pk)
+    pages are fetched relative to the last row seen instead of with OFFSET,
+    and no COUNT is run, so a deep page costs the same as the first one
+    """
+    mode = 'cursor'
+    salt = 'forum.pagination.cursor'
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        prefix = '-' if self.descending else ''
+        self.ordering = (f'{prefix}{self.field}', f'{prefix}pk')
+        reverse_prefix = '' if self.descending else '-'
+        self.reverse_ordering = (
+            f'{reverse_prefix}{self.field}', f'{reverse_prefix}pk')
+
+    def encode(self, obj, direction):
+        """returns an opaque, signed token pointing at obj"""
+        value = getattr(obj, self.field)
+        return signing.dumps([value.isoformat(), obj.pk, direction], salt=self.salt)
+
+    def decode(self, cursor):
+        try:
+            value, pk, direction = signing.loads(cursor, salt=self.salt)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise Http404('Invalid cursor')
+        model_field = self.queryset.model._meta.get_field(self.field)
+        return model_field.to_python(value), pk, direction
+
+    def _after(self, value, pk):
+        lookup = 'lt' if self.descending else 'gt'
+        return (Q(**{f'{self.field}__{lookup}': value}) |
+                Q(**{self.field: value, f'pk__{lookup}': pk}))
+
+    def _before(self, value, pk):
+        lookup = 'gt' if self.descending else 'lt'
+        return (Q(**{f'{self.field}__{lookup}': value}) |
+                Q(**{self.field: value, f'pk__{lookup}': pk}))
+
+    def _plan(self, cursor):
+        """
+        returns the query for a page, whether it reads backwards from the
+        end, and whether a real cursor proves a page exists on the other side
+        """
+        limit = self.per_page + 1
+        if cursor is None:
+            return self.queryset.order_by(*self.ordering)[:limit], False, False
+        if cursor == 'last':
+            return self.queryset.order_by(*self.reverse_ordering)[:limit], True, False
+
+        value, pk, direction = self.decode(cursor)
+        if direction == 'next':
+            return self.queryset.filter(self._after(value, pk)).order_by(
+                *self.ordering)[:limit], False, True
+        if direction == 'previous':
+            return self.queryset.filter(self._before(value, pk)).order_by(
+                *self.reverse_ordering)[:limit], True, True
+        raise Http404('Invalid cursor')
+
+    def _build(self, rows, backwards, from_cursor):
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            return CursorPage(rows[::-1], self, from_cursor, more)
+        return CursorPage(rows, self, more, from_cursor)
+
+    def page(self, cursor=None):
+        """
+        returns the page starting after a 'next' token or ending before a
+        'previous' token, the first page when cursor is None and the final
+        page when cursor is 'last'
+        """
+        queryset, backwards, from_cursor = self._plan(cursor)
+        return self._build(list(queryset), backwards, from_cursor)
+
+    async def apage(self, cursor=None):
+        """page() for async views"""
+        queryset, backwards, from_cursor = self._plan(cursor)
+        return self._build([row async for row in queryset], backwards, from_cursor)
+
+
+class CursorPaginationMixin:
+    """
+    ListView mixin adding a windowed page range in offset mode and switching
+    to keyset pagination on cursor_ordering when PAGINATION_MODE is 'cursor'
+    """
+    cursor_ordering = None
+    page_window = 2
+
+    def get_cursor(self):
+        cursor = self.request.GET.get('cursor')
+        if cursor is None and self.request.GET.get('page') == 'last':
+            cursor = 'last'
+        return cursor
+
+    def paginate_queryset(self, queryset, page_size):
+        if settings.PAGINATION_MODE != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        page = paginator.page(self.get_cursor())
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """paginate_queryset() reading the count and the page with the async ORM"""
+        if settings.PAGINATION_MODE == 'cursor':
+            paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+            page = await paginator.apage(self.get_cursor())
+            return (paginator, page, page.object_list, page.has_other_pages())
+
+        paginator = self.get_paginator(
+            queryset, page_size, orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty())
+        # Paginator.count is a cached_property, setting it skips the sync COUNT
+        paginator.count = await queryset.acount()
+        page_kwarg = self.page_kwarg
+        page = self.kwargs.get(page_kwarg) or self.request.GET.get(page_kwarg) or 1
+        try:
+            page_number = int(page)
+        except ValueError:
+            if page != 'last':
+                raise Http404('Page is not “last”, nor can it be converted to an int.')
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as e:
+            raise Http404(f'Invalid page ({page_number}): {e}')
+        page.object_list = [obj async for obj in page.object_list]
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        paginator = context.get('paginator')
+        if paginator is not None and getattr(paginator, 'mode', None) != 'cursor':
+            context['page_range'] = list(paginator.get_elided_page_range(
+                context['page_obj'].number, on_each_side=self.page_window, on_ends=1))
+        return context
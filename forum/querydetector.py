@@ -0,0 +1,145 @@
+"""
+Development check for N+1 and slow queries, enabled with QUERY_DETECTOR.
+
+Every query of a request is reduced to its shape, literals and IN lists
+folded away, and remembered with the template line and project code that
+ran it. A shape repeated QUERY_REPEAT_THRESHOLD or more times is reported
+with where it came from, as is any query slower than SLOW_QUERY_MS; with
+QUERY_DETECTOR=raise repeated queries fail the request, and with it any
+test that makes it.
+"""
+import logging
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('forum.queries')
+
+IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+# transaction bookkeeping repeats legitimately
+IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# execute wrappers, never where a query comes from
+INSTRUMENTATION = (Path(__file__), Path(__file__).with_name('metrics.py'))
+
+
+class RepeatedQueries(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """the shape of a query, equal for queries that differ only in their values"""
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+def is_project_code(filename):
+    path = Path(filename)
+    return (path.is_relative_to(settings.BASE_DIR) and 'site-packages' not in path.parts
+            and path not in INSTRUMENTATION)
+
+
+def origin():
+    """the innermost template line and project frame on the stack"""
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and not (template and code):
+        node = frame.f_locals.get('self')
+        if (template is None and frame.f_code.co_name == 'render_annotated'
+                and getattr(node, 'token', None) is not None):
+            name = node.origin.template_name or node.origin.name
+            template = f'{name}, line {node.token.lineno}'
+        elif code is None and is_project_code(frame.f_code.co_filename):
+            filename = Path(frame.f_code.co_filename).relative_to(settings.BASE_DIR)
+            code = f'{filename}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ' via '.join(filter(None, (template, code))) or 'unknown'
+
+
+class RepeatedQuery:
+    def __init__(self, fingerprint, queries):
+        self.fingerprint = fingerprint
+        self.count = len(queries)
+        self.duration = sum(duration for duration, where in queries)
+        self.origins = Counter(where for duration, where in queries)
+
+    def __str__(self):
+        lines = [f'{self.count} x {self.fingerprint} ({self.duration * 1000:.1f} ms)']
+        lines.extend(f'    {count} from {where}' for where, count in self.origins.most_common())
+        return '\n'.join(lines)
+
+
+class QueryLog:
+    """execute wrapper collecting the queries run while it is installed"""
+
+    def __init__(self):
+        self.queries = defaultdict(list)
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if not sql.startswith(IGNORED):
+                where = origin()
+                self.queries[fingerprint(sql)].append((duration, where))
+                if duration * 1000 >= settings.SLOW_QUERY_MS:
+                    self.slow.append((duration, sql, where))
+
+    def repeated(self, threshold=None):
+        """shapes run at least threshold times, the most repeated first"""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        found = [RepeatedQuery(shape, queries) for shape, queries in self.queries.items()
+                 if len(queries) >= threshold]
+        return sorted(found, key=lambda repeated: -repeated.count)
+
+
+@contextmanager
+def detect():
+    """collects the queries of the block on every database connection"""
+    log = QueryLog()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
+
+
+def report(log, label, fail=False):
+    for duration, sql, where in log.slow:
+        logger.warning('Slow query in %s (%.1f ms) from %s\n    %s',
+                       label, duration * 1000, where, sql)
+    repeated = log.repeated()
+    if not repeated:
+        return
+    message = f'Repeated queries in {label}:\n' + '\n'.join(map(str, repeated))
+    if fail:
+        raise RepeatedQueries(message)
+    logger.warning(message)
+
+
+class QueryDetectorMiddleware:
+    """
+    sync only, so async views run their queries through sync_to_async in
+    this thread, where the wrappers are installed
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect() as log:
+            response = self.get_response(request)
+        report(log, f'{request.method} {request.path}',
+               fail=settings.QUERY_DETECTOR == 'raise')
+        return response
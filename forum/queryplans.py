@@ -0,0 +1,89 @@
+"""
+EXPLAIN checks for the queries behind the forum's busiest pages.
+
+A hot query must be answered from an index: no table may be read in full
+and no rows may be sorted in a temporary structure when an index could
+have returned them in order. PostgreSQL prefers sequential scans on small
+tables whatever indexes exist, so its plans are taken with seq scans and
+sorts discouraged; one still chosen means no index can serve the query.
+"""
+import re
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import Forum, Topic, Post
+from .pagination import CursorPaginator
+from .views import TopicListView, PostListView
+
+PROBLEMS = {
+    'sqlite': [
+        (re.compile(r'\bSCAN (TABLE )?\S+$', re.MULTILINE), 'sequential scan'),
+        (re.compile(r'\bUSE TEMP B-TREE FOR (ORDER|GROUP) BY\b'), 'temp sort'),
+    ],
+    'postgresql': [
+        (re.compile(r'\bSeq Scan\b'), 'sequential scan'),
+        (re.compile(r'(^|->)\s*(Incremental )?Sort\b', re.MULTILINE), 'temp sort'),
+    ],
+}
+
+
+def plan_problems(vendor, plan):
+    """names of the problems found in a plan, in order and without repeats"""
+    try:
+        patterns = PROBLEMS[vendor]
+    except KeyError:
+        raise NotImplementedError(f'Query plans cannot be checked on {vendor}')
+    return [problem for pattern, problem in patterns if pattern.search(plan)]
+
+
+def explain(queryset):
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+
+def hot_queries():
+    """
+    (name, queryset) pairs, built by the views themselves so the plans are
+    those of the real queries; parameters come from existing rows if any
+    """
+    forum_pk = Forum.objects.values_list('pk', flat=True).first() or 0
+    topic_pk = Topic.objects.values_list('pk', flat=True).first() or 0
+    user_pk = User.objects.values_list('pk', flat=True).first() or 0
+    now = timezone.now()
+
+    topics = TopicListView(kwargs={'pk': forum_pk})
+    topics.forum = Forum(pk=forum_pk)
+    topic_pages = CursorPaginator(topics.get_topics(), topics.paginate_by, '-last_updated')
+    posts = PostListView(kwargs={'pk': forum_pk, 'topic_pk': topic_pk})
+    posts.topic = Topic(pk=topic_pk, forum_id=forum_pk)
+    post_pages = CursorPaginator(posts.get_posts(), settings.POSTS_PER_PAGE, 'created_at')
+
+    return [
+        ('topic list', topics.get_topics()[:topics.paginate_by]),
+        ('topic list, cursor page', topic_pages._plan(
+            topic_pages.encode(Topic(pk=0, last_updated=now), 'next'))[0]),
+        ('topic list, last modified', topics.get_freshness_queryset()),
+        ('thread topic', posts.get_topic_queryset()),
+        ('thread page', posts.get_posts()[:settings.POSTS_PER_PAGE]),
+        ('thread, cursor page', post_pages._plan(
+            post_pages.encode(Post(pk=0, created_at=now), 'next'))[0]),
+        ('thread, last modified', posts.get_freshness_queryset()),
+        ('posts by user', Post.objects.filter(created_by_id=user_pk).order_by().values(
+            'created_by').annotate(total=Count('pk'))),
+    ]
+
+
+def check():
+    """(name, plan, problems) for every hot query"""
+    results = []
+    for name, queryset in hot_queries():
+        plan = explain(queryset)
+        results.append((name, plan, plan_problems(connection.vendor, plan)))
+    return results
@@ -0,0 +1,231 @@
+"""
+Full-text search over topic subjects and post messages.
+
+SQLite keeps two FTS5 tables keyed by rowid (forum_topic_fts, forum_post_fts)
+which the post_save/post_delete receivers update one row at a time, once
+the write commits, so the FTS insert does not hold the write lock.
+PostgreSQL matches against GIN expression indexes on to_tsvector(), which the
+database maintains itself. Both are created by migration 0006. Other
+databases fall back to unindexed substring matching.
+
+Scores from the topic and post indexes are not on the same scale, so
+matching topics are listed first and posts after them, each ranked only
+against their own kind.
+"""
+import re
+from collections import namedtuple
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# markers wrapped around matched terms, swapped for <mark> after escaping
+START, STOP = '\x02', '\x03'
+# control characters, the markers above among them, are read as spaces:
+# FTS5 and psycopg2 reject a NUL in the query outright
+CONTROL = re.compile('[\x00-\x1f\x7f]')
+
+SearchHit = namedtuple('SearchHit', 'kind topic_id post_id snippet topic', defaults=[None])
+
+
+def highlight(text):
+    """escapes a snippet returned by the database and marks the matched terms"""
+    html = escape(text).replace(START, '<mark>').replace(STOP, '</mark>')
+    return mark_safe(html)
+
+
+class SQLiteBackend:
+    def index_topic(self, topic):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO forum_topic_fts (rowid, subject) VALUES (%s, %s)',
+                [topic.pk, topic.subject])
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO forum_post_fts (rowid, message) VALUES (%s, %s)',
+                [post.pk, post.message])
+
+    def remove_topic(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM forum_topic_fts WHERE rowid = %s', [pk])
+
+    def remove_post(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM forum_post_fts WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM forum_topic_fts')
+            cursor.execute('DELETE FROM forum_post_fts')
+            cursor.execute(
+                'INSERT INTO forum_topic_fts (rowid, subject) SELECT id, subject FROM forum_topic')
+            cursor.execute(
+                'INSERT INTO forum_post_fts (rowid, message) SELECT id, message FROM forum_post')
+
+    @staticmethod
+    def to_match(query):
+        """quotes every term so user input is never parsed as FTS5 syntax"""
+        terms = query.split()
+        return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def search(self, query, offset, limit):
+        match = self.to_match(query)
+        if not match:
+            return []
+        # rank first, and only build snippets for the rows on this page
+        with connection.cursor() as cursor:
+            cursor.execute('''
+                SELECT 'topic', forum_topic_fts.rowid, NULL, 0 AS source,
+                       bm25(forum_topic_fts) AS rank
+                FROM forum_topic_fts WHERE forum_topic_fts MATCH %s
+                UNION ALL
+                SELECT 'post', forum_post.topic_id, forum_post_fts.rowid, 1,
+                       bm25(forum_post_fts)
+                FROM forum_post_fts JOIN forum_post ON forum_post.id = forum_post_fts.rowid
+                WHERE forum_post_fts MATCH %s
+                ORDER BY source, rank LIMIT %s OFFSET %s
+            ''', [match, match, limit, offset])
+            rows = cursor.fetchall()
+            snippets = {}
+            for kind, table in (('topic', 'forum_topic_fts'), ('post', 'forum_post_fts')):
+                pks = [row[1] if kind == 'topic' else row[2]
+                       for row in rows if row[0] == kind]
+                if not pks:
+                    continue
+                placeholders = ', '.join(['%s'] * len(pks))
+                cursor.execute(
+                    f'SELECT rowid, snippet({table}, 0, %s, %s, %s, 24) FROM {table} '
+                    f'WHERE {table} MATCH %s AND rowid IN ({placeholders})',
+                    [START, STOP, '…', match, *pks])
+                snippets.update(((kind, pk), text) for pk, text in cursor.fetchall())
+        return [
+            SearchHit(kind, topic_id, post_id, highlight(
+                snippets.get((kind, topic_id if kind == 'topic' else post_id), '')))
+            for kind, topic_id, post_id, source, rank in rows
+        ]
+
+
+class PostgreSQLBackend:
+    # the GIN expression indexes keep themselves up to date
+    def index_topic(self, topic):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def remove_topic(self, pk):
+        pass
+
+    def remove_post(self, pk):
+        pass
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('REINDEX INDEX forum_topic_subject_fts_idx')
+            cursor.execute('REINDEX INDEX forum_post_message_fts_idx')
+
+    def search(self, query, offset, limit):
+        if not query.strip():
+            return []
+        options = f'StartSel={START}, StopSel={STOP}, MaxWords=35, MinWords=15'
+        with connection.cursor() as cursor:
+            cursor.execute('''
+                WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query),
+                hits AS (
+                    SELECT 'topic' AS kind, t.id AS topic_id, NULL::bigint AS post_id,
+                           t.subject AS body, 0 AS source,
+                           ts_rank(to_tsvector('english', t.subject), q.query) AS rank
+                    FROM forum_topic t, q
+                    WHERE to_tsvector('english', t.subject) @@ q.query
+                    UNION ALL
+                    SELECT 'post', p.topic_id, p.id, p.message, 1,
+                           ts_rank(to_tsvector('english', p.message), q.query)
+                    FROM forum_post p, q
+                    WHERE to_tsvector('english', p.message) @@ q.query
+                    ORDER BY source, rank DESC LIMIT %s OFFSET %s
+                )
+                SELECT kind, topic_id, post_id, ts_headline('english', body, q.query, %s)
+                FROM hits, q ORDER BY source, rank DESC
+            ''', [query, limit, offset, options])
+            rows = cursor.fetchall()
+        return [SearchHit(kind, topic_id, post_id, highlight(text))
+                for kind, topic_id, post_id, text in rows]
+
+
+class FallbackBackend:
+    """unindexed icontains matching, for databases without full-text search"""
+    SNIPPET_CONTEXT = 60
+
+    def index_topic(self, topic):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def remove_topic(self, pk):
+        pass
+
+    def remove_post(self, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def snippet(self, text, terms):
+        """the text around the first matched term, matches between markers"""
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        first = pattern.search(text)
+        start = max(first.start() - self.SNIPPET_CONTEXT, 0) if first else 0
+        excerpt = text[start:start + 2 * self.SNIPPET_CONTEXT + 40]
+        excerpt = pattern.sub(lambda match: f'{START}{match.group()}{STOP}', excerpt)
+        return ('…' if start else '') + excerpt + ('…' if start + len(excerpt) < len(text) else '')
+
+    def search(self, query, offset, limit):
+        from .models import Post, Topic
+
+        terms = query.split()
+        if not terms:
+            return []
+        topics, posts = Topic.objects.all(), Post.objects.all()
+        for term in terms:
+            topics = topics.filter(subject__icontains=term)
+            posts = posts.filter(message__icontains=term)
+        end = offset + limit
+        hits = [SearchHit('topic', pk, None, highlight(self.snippet(subject, terms)))
+                for pk, subject in topics.order_by('-last_updated', '-pk').values_list(
+                    'pk', 'subject')[:end]]
+        if len(hits) < end:
+            hits += [SearchHit('post', topic_id, pk, highlight(self.snippet(message, terms)))
+                     for pk, topic_id, message in posts.order_by('-created_at', '-pk').values_list(
+                         'pk', 'topic_id', 'message')[:end - len(hits)]]
+        return hits[offset:end]
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, FallbackBackend)()
+
+
+def search(query, page=1, per_page=20):
+    """
+    returns the ranked hits of a page, with their topics attached, and whether
+    a next page exists; fetching one extra row avoids counting every match
+    """
+    from .models import Topic
+
+    offset = (page - 1) * per_page
+    query = CONTROL.sub(' ', query)
+    hits = get_backend().search(query, offset, per_page + 1)
+    has_next = len(hits) > per_page
+    hits = hits[:per_page]
+    topics = Topic.objects.select_related('forum').in_bulk(
+        {hit.topic_id for hit in hits})
+    results = [hit._replace(topic=topics[hit.topic_id])
+               for hit in hits if hit.topic_id in topics]
+    return results, has_next
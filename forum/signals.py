@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import Profile
+from .caching import FORUMS, author_scopes, bump_on_commit, forum_scope, topic_scope
+from .models import Forum, Topic, Post
+from .search import get_backend
+
+
+def post_forum(post):
+    """the forum of a post, filtered on its topic's forum_id when that is loaded"""
+    if Post.topic.is_cached(post):
+        return Forum.objects.filter(pk=post.topic.forum_id)
+    return Forum.objects.filter(topics__pk=post.topic_id)
+
+
+def post_forum_id(post):
+    if Post.topic.is_cached(post):
+        return post.topic.forum_id
+    return Topic.objects.filter(pk=post.topic_id).values_list('forum_id', flat=True).first()
+
+
+@receiver(post_save, sender=Topic)
+def topic_created(sender, instance, created, raw=False, **kwargs):
+    """counts a newly opened topic against its forum"""
+    if created and not raw:
+        Forum.objects.filter(pk=instance.forum_id).update(
+            topic_count=F('topic_count') + 1)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    """
+    counts a new post against its forum and author, and marks it as the
+    forum's latest one
+    """
+    if created and not raw:
+        post_forum(instance).update(
+            post_count=F('post_count') + 1, last_post=instance.pk)
+        updated = Profile.objects.filter(user_id=instance.created_by_id).update(
+            post_count=F('post_count') + 1)
+        if not updated:
+            Profile.objects.get_or_create(
+                user_id=instance.created_by_id,
+                defaults={'post_count': Post.objects.filter(
+                    created_by_id=instance.created_by_id).count()})
+
+
+@receiver(post_delete, sender=Topic)
+def topic_deleted(sender, instance, **kwargs):
+    """removes a deleted topic from its forum's count"""
+    Forum.objects.filter(pk=instance.forum_id, topic_count__gt=0).update(
+        topic_count=F('topic_count') - 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """
+    removes a deleted post from its forum's and author's counts
+    deleting the latest post nulls last_post, so it is recomputed here
+    """
+    forums = post_forum(instance)
+    forums.filter(post_count__gt=0).update(post_count=F('post_count') - 1)
+    forums.filter(last_post__isnull=True).rebuild_last_post()
+    Profile.objects.filter(user_id=instance.created_by_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1)
+
+
+def on_commit(func, *args):
+    """
+    runs func once the transaction commits, outside the write lock; a
+    failure is logged rather than failing a write that is already committed
+    """
+    transaction.on_commit(lambda: func(*args), robust=True)
+
+
+@receiver(post_save, sender=Topic)
+def index_topic(sender, instance, raw=False, **kwargs):
+    """keeps the topic's subject searchable"""
+    if not raw:
+        on_commit(get_backend().index_topic, instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    """keeps the post's message searchable"""
+    if not raw:
+        on_commit(get_backend().index_post, instance)
+
+
+@receiver(post_delete, sender=Topic)
+def unindex_topic(sender, instance, **kwargs):
+    on_commit(get_backend().remove_topic, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    on_commit(get_backend().remove_post, instance.pk)
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+def invalidate_topic_pages(sender, instance, raw=False, **kwargs):
+    """expires the cached forum list, topic list and thread of a topic"""
+    if not raw:
+        bump_on_commit(FORUMS, forum_scope(instance.forum_id), topic_scope(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, raw=False, created=True, **kwargs):
+    """
+    expires the cached thread of a post; new and deleted posts also change
+    the counters and ordering shown on the forum and topic lists, and the
+    author's post count on every thread they have posted in
+    """
+    if raw:
+        return
+    if created:
+        threads = {topic_scope(instance.topic_id), *author_scopes(instance.created_by_id)}
+        bump_on_commit(FORUMS, forum_scope(post_forum_id(instance)), *threads)
+    else:
+        bump_on_commit(topic_scope(instance.topic_id))
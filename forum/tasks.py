@@ -0,0 +1,11 @@
+from django.core.mail import EmailMultiAlternatives
+from .jobs import task
+
+
+@task
+def send_email(subject, body, from_email, to, html=None):
+    """sends an email rendered by the request that queued it"""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
@@ -1,4 +1,6 @@
 import hashlib
+import threading
+from collections import OrderedDict
 from urllib.parse import urlencode
 from django import template
 from django.conf import settings
@@ -6,13 +8,75 @@ from django.conf import settings
 register = template.Library()
 
 
-@register.filter
-def gravatar(user):
-    email = user.email.lower().encode('utf-8')
-    default = 'mm'
-    size = 256
-    url = 'https://www.gravatar.com/avatar/{md5}?{params}'.format(
-        md5=hashlib.md5(email).hexdigest(),
+class LRUCache:
+    """small thread-safe least recently used mapping"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_prefix(self, prefix):
+        """drops every entry whose key tuple starts with prefix"""
+        with self._lock:
+            for key in [key for key in self._data if key[:len(prefix)] == prefix]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+url_cache = LRUCache(settings.GRAVATAR_CACHE_SIZE)
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def build_gravatar_url(email, size, default):
+    return 'https://www.gravatar.com/avatar/{md5}?{params}'.format(
+        md5=hashlib.md5(email.encode('utf-8')).hexdigest(),
         params=urlencode({'d': default, 's': str(size)})
     )
+
+
+def gravatar_url(email, size=None, default=None):
+    """returns the memoized gravatar URL for an email address"""
+    email = normalize_email(email)
+    size = int(size or settings.GRAVATAR_SIZE)
+    default = default or settings.GRAVATAR_DEFAULT
+    key = (email, size, default)
+    url = url_cache.get(key)
+    if url is None:
+        url = build_gravatar_url(email, size, default)
+        url_cache.set(key, url)
     return url
+
+
+def forget_email(email):
+    """evicts every cached URL of an email address, e.g. after it changed"""
+    url_cache.discard_prefix((normalize_email(email),))
+
+
+@register.filter
+def gravatar(user, size=None):
+    return gravatar_url(user.email, size)
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from ..querydetector import detect
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for asserting an upper bound on queries per request"""
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using='default'):
+        """fails if the block runs more than budget queries, listing them"""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, 1))
+            self.fail(f'{executed} queries executed, at most {budget} expected\n'
+                      f'Captured queries were:\n{queries}')
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=None):
+        """fails if the block runs one query shape threshold times or more"""
+        with detect() as log:
+            yield log
+        repeated = log.repeated(threshold)
+        if repeated:
+            self.fail('Repeated queries:\n' + '\n'.join(map(str, repeated)))
@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from mydjangoapp.urls import urlpatterns as project_urlpatterns
+from ..async_views import AsyncForumListView, AsyncTopicListView, AsyncPostListView
+from ..counters import topic_views
+from ..models import Forum, Post, Topic
+
+# the async views take precedence over the project's sync ones, whose names
+# still reverse to the same paths
+urlpatterns = [
+    path('', AsyncForumListView.as_view()),
+    path('forum/<int:pk>/topics/<int:topic_pk>/', AsyncPostListView.as_view()),
+    path('forum/<int:pk>/', AsyncTopicListView.as_view()),
+] + project_urlpatterns
+
+
+@override_settings(ROOT_URLCONF=__name__, CACHE_PAGE_SECONDS=0,
+                   TOPIC_VIEWS_FLUSH_INTERVAL=3600, POSTS_PER_PAGE=2)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        """creates a forum with one topic of three posts"""
+        cache.clear()
+        caches['viewers'].clear()
+        topic_views.flush()
+        user = User.objects.create_user(username='john', password='123')
+        self.forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(subject='Async topic', forum=self.forum, opener=user)
+        for i in range(3):
+            Post.objects.create(message=f'Post {i}', topic=self.topic, created_by=user)
+        self.forum_url = reverse('forum_topics', kwargs={'pk': self.forum.pk})
+        self.topic_url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_views_are_async(self):
+        """tests that django runs the views as coroutines"""
+        for view in (AsyncForumListView, AsyncTopicListView, AsyncPostListView):
+            self.assertTrue(view.view_is_async)
+
+    async def test_forum_list(self):
+        """tests that the home page lists the forum"""
+        response = await self.async_client.get(reverse('home'))
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, 'Banter')
+
+    async def test_topic_list(self):
+        """tests that the forum page lists its topics and 404s on unknown forums"""
+        response = await self.async_client.get(self.forum_url)
+        self.assertContains(response, 'Async topic')
+        self.assertEquals(response.context['forum'], self.forum)
+        missing = await self.async_client.get(reverse('forum_topics', kwargs={'pk': 99}))
+        self.assertEquals(missing.status_code, 404)
+
+    async def test_post_pages(self):
+        """tests offset pages, the last page and an out of range page"""
+        first = await self.async_client.get(self.topic_url)
+        self.assertEquals([post.message for post in first.context['posts']],
+                          ['Post 0', 'Post 1'])
+        self.assertEquals(first.context['page_range'], [1, 2])
+        last = await self.async_client.get(self.topic_url, {'page': 'last'})
+        self.assertEquals([post.message for post in last.context['posts']], ['Post 2'])
+        missing = await self.async_client.get(self.topic_url, {'page': 3})
+        self.assertEquals(missing.status_code, 404)
+
+    @override_settings(PAGINATION_MODE='cursor')
+    async def test_cursor_pages(self):
+        """tests that the next cursor leads to the rest of the thread"""
+        first = await self.async_client.get(self.topic_url)
+        cursor = first.context['page_obj'].next_cursor
+        second = await self.async_client.get(self.topic_url, {'cursor': cursor})
+        self.assertEquals([post.message for post in second.context['posts']], ['Post 2'])
+
+    async def test_view_counted_once(self):
+        """tests that a returning viewer counts one view of the topic"""
+        await self.async_client.get(self.topic_url)
+        await self.async_client.get(self.topic_url)
+        self.assertEquals(topic_views.pending(self.topic.pk), 1)
+
+    async def test_not_modified(self):
+        """tests that the conditional GET support carries over"""
+        response = await self.async_client.get(self.forum_url)
+        revalidated = await self.async_client.get(
+            self.forum_url, headers={'If-None-Match': response['ETag']})
+        self.assertEquals(revalidated.status_code, 304)
+
+    @override_settings(CACHE_PAGE_SECONDS=60)
+    async def test_page_cache(self):
+        """tests that a second anonymous read is served from the page cache"""
+        await cache.aclear()
+        await self.async_client.get(self.topic_url)
+        cached = await self.async_client.get(self.topic_url)
+        self.assertContains(cached, 'Post 0')
+        self.assertIsNone(cached.context)
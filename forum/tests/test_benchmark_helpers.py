@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# run in a child process, as temporary_database() swaps the connection's database
+SCRIPT = '''
+from common import setup_django, temporary_database
+setup_django()
+from django.contrib.auth.models import User
+from forum.counters import topic_views
+from forum.models import Forum, Topic
+with temporary_database():
+    user = User.objects.create_user(username='john')
+    forum = Forum.objects.create(name='Banter', description='Banter')
+    topic = Topic.objects.create(subject='Viewed', forum=forum, opener=user)
+    topic_views.add(topic.pk, 8)
+print(topic_views.pending(topic.pk))
+'''
+
+
+class TemporaryDatabaseTests(SimpleTestCase):
+    def test_no_views_left_pending(self):
+        """tests that views recorded in a benchmark database are not flushed at exit"""
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'dev.sqlite3')
+            result = subprocess.run(
+                [sys.executable, '-c', SCRIPT], capture_output=True, text=True,
+                cwd=settings.BASE_DIR / 'benchmarks',
+                env={**os.environ, 'DATABASE_URL': f'sqlite:///{database}',
+                     'TOPIC_VIEWS_FLUSH_INTERVAL': '3600'})
+            self.assertEquals(result.returncode, 0, result.stderr)
+            self.assertEquals(result.stdout.strip(), '0')
+            self.assertNotIn('topic views failed', result.stderr)
+            self.assertFalse(os.path.exists(database))
@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..counters import topic_views
+from ..models import Forum, Post, Topic
+
+
+@override_settings(CACHE_PAGE_SECONDS=0, TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        """creates a topic with one post"""
+        self.user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        self.forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(
+            subject='First topic', forum=self.forum, opener=self.user)
+        self.post = Post.objects.create(
+            message='First post', topic=self.topic, created_by=self.user)
+        self.topic_url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+        self.forum_url = reverse('forum_topics', kwargs={'pk': self.forum.pk})
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_not_modified(self):
+        """tests that an unchanged page is answered with a 304 after one forum query"""
+        for url in (self.forum_url, self.topic_url):
+            response = self.client.get(url)
+            self.assertIn('Last-Modified', response)
+            with CaptureQueriesContext(connection) as captured:
+                revalidated = self.revalidate(url, response)
+            self.assertEquals(revalidated.status_code, 304)
+            self.assertEquals(
+                len([query for query in captured if 'forum_' in query['sql']]), 1)
+
+    def test_if_modified_since(self):
+        """tests revalidation with the Last-Modified date alone"""
+        response = self.client.get(self.topic_url)
+        revalidated = self.client.get(
+            self.topic_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEquals(revalidated.status_code, 304)
+
+    def test_reply_modifies(self):
+        """tests that a reply changes both pages"""
+        topic_page = self.client.get(self.topic_url)
+        forum_page = self.client.get(self.forum_url)
+        Post.objects.create(message='Reply', topic=self.topic, created_by=self.user)
+        Topic.objects.filter(pk=self.topic.pk).update(last_updated=self.post.created_at.replace(
+            year=self.post.created_at.year + 1))
+        self.assertEquals(self.revalidate(self.topic_url, topic_page).status_code, 200)
+        self.assertEquals(self.revalidate(self.forum_url, forum_page).status_code, 200)
+
+    def test_edit_modifies(self):
+        """tests that editing a post changes its thread"""
+        response = self.client.get(self.topic_url)
+        self.client.login(username='john', password='123')
+        self.client.post(reverse('edit', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk, 'post_pk': self.post.pk}),
+            {'message': 'Edited'})
+        self.client.logout()
+        self.assertEquals(self.revalidate(self.topic_url, response).status_code, 200)
+
+    def test_author_reply_modifies(self):
+        """tests that a reply in another thread changes the author's post count here"""
+        other_forum = Forum.objects.create(name='Other', description='Other')
+        other_topic = Topic.objects.create(
+            subject='Other topic', forum=other_forum, opener=self.user)
+        self.client.login(username='john', password='123')
+        response = self.client.get(self.topic_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(message='Reply', topic=other_topic, created_by=self.user)
+        revalidated = self.revalidate(self.topic_url, response)
+        self.assertEquals(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Posts: 2')
+
+    @override_settings(POSTS_PER_PAGE=1)
+    def test_page_and_user_change_etag(self):
+        """tests that other pages and other users get their own tags"""
+        Post.objects.create(message='Reply', topic=self.topic, created_by=self.user)
+        first = self.client.get(self.topic_url)
+        second = self.client.get(self.topic_url, {'page': 2})
+        self.client.login(username='john', password='123')
+        logged_in = self.client.get(self.topic_url)
+        self.assertEquals(len({first['ETag'], second['ETag'], logged_in['ETag']}), 3)
+
+    def test_missing_topic(self):
+        """tests that a missing topic is still a 404"""
+        url = reverse('topic_posts', kwargs={'pk': self.forum.pk, 'topic_pk': 99})
+        self.assertEquals(self.client.get(url).status_code, 404)
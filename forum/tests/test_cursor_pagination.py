@@ -0,0 +1,110 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Forum, Post, Topic
+
+
+@override_settings(PAGINATION_MODE='cursor', POSTS_PER_PAGE=5, TOPIC_VIEWS_FLUSH_INTERVAL=3600,
+                   CACHE_PAGE_SECONDS=0)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        """initialises a forum with 12 topics and a topic with 12 posts"""
+        self.forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        now = timezone.now()
+        Topic.objects.bulk_create(
+            Topic(subject=f'Topic {i}', forum=self.forum, opener=user)
+            for i in range(12))
+        # several topics share a timestamp so the pk tie-breaker is exercised
+        for i, topic in enumerate(Topic.objects.order_by('pk')):
+            Topic.objects.filter(pk=topic.pk).update(
+                last_updated=now - timedelta(minutes=i // 3))
+        self.topic = Topic.objects.order_by('pk').first()
+        Post.objects.bulk_create(
+            Post(message=f'Post {i}', topic=self.topic, created_by=user)
+            for i in range(12))
+        self.topics_url = reverse('forum_topics', kwargs={'pk': self.forum.pk})
+        self.posts_url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+
+    def walk(self, url, name):
+        """follows next cursors to the end, then previous cursors back"""
+        pages = []
+        response = self.client.get(url)
+        while True:
+            pages.append([obj.pk for obj in response.context[name]])
+            cursor = response.context['page_obj'].next_cursor
+            if cursor is None:
+                break
+            response = self.client.get(url, {'cursor': cursor})
+        backwards = []
+        while True:
+            cursor = response.context['page_obj'].previous_cursor
+            if cursor is None:
+                break
+            response = self.client.get(url, {'cursor': cursor})
+            backwards.append([obj.pk for obj in response.context[name]])
+        return pages, backwards
+
+    def test_topic_pages(self):
+        """tests that cursors visit every topic once in last_updated order"""
+        pages, backwards = self.walk(self.topics_url, 'topics')
+        expected = list(Topic.objects.order_by(
+            '-last_updated', '-pk').values_list('pk', flat=True))
+        self.assertEquals(sum(pages, []), expected)
+        self.assertEquals(backwards, pages[-2::-1])
+
+    def test_post_pages(self):
+        """tests that cursors visit every post once in created_at order"""
+        pages, backwards = self.walk(self.posts_url, 'posts')
+        expected = list(self.topic.posts.order_by(
+            'created_at', 'pk').values_list('pk', flat=True))
+        self.assertEquals(sum(pages, []), expected)
+        self.assertEquals([len(page) for page in pages], [5, 5, 2])
+        self.assertEquals(backwards, pages[-2::-1])
+
+    def test_last_page(self):
+        """tests that page=last returns the final posts"""
+        response = self.client.get(self.posts_url, {'page': 'last'})
+        expected = list(self.topic.posts.order_by(
+            'created_at', 'pk').values_list('pk', flat=True))[-5:]
+        self.assertEquals([post.pk for post in response.context['posts']], expected)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_invalid_cursor(self):
+        """tests that a tampered cursor is not found"""
+        response = self.client.get(self.topics_url, {'cursor': 'garbage'})
+        self.assertEquals(response.status_code, 404)
+
+    def test_deep_page_costs_same_as_first(self):
+        """tests that a deep page runs the same queries as page one, without OFFSET"""
+        self.client.get(self.posts_url)
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.posts_url)
+        cursor = response.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(self.posts_url, {'cursor': cursor})
+        self.assertEquals(len(deep), len(first))
+        self.assertFalse(any('OFFSET' in query['sql'] for query in deep))
+
+
+@override_settings(PAGINATION_MODE='offset')
+class WindowedPageRangeTests(TestCase):
+    def test_page_range_is_elided(self):
+        """tests that the offset nav only links pages around the current one"""
+        forum = Forum.objects.create(name='Banter', description='Banter')
+        user = User.objects.create_user(username='john', password='123')
+        Topic.objects.bulk_create(
+            Topic(subject=f'Topic {i}', forum=forum, opener=user)
+            for i in range(25 * 20))
+        url = reverse('forum_topics', kwargs={'pk': forum.pk})
+        response = self.client.get(url, {'page': 10})
+        self.assertEquals(list(response.context['page_range']),
+                          [1, '…', 8, 9, 10, 11, 12, '…', 20])
+        self.assertNotContains(response, '?page=15"')
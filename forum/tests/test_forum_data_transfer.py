@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from accounts.models import Profile
+from ..models import Forum, Post, Topic
+from ..transfer import open_file
+
+
+class ForumDataTransferTests(TestCase):
+    def setUp(self):
+        call_command('seed_forum', forums=2, topics=6, posts=40, users=5, stdout=StringIO())
+        Post.objects.filter(pk=1).update(updated_at=Post.objects.get(pk=1).created_at,
+                                         updated_by=User.objects.get(username='user1'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'forum.ndjson.gz')
+
+    def export(self):
+        call_command('export_forum_data', self.path, batch_size=7, stderr=StringIO())
+
+    def snapshot(self):
+        return (list(User.objects.order_by('pk').values()),
+                list(Forum.objects.order_by('pk').values()),
+                list(Topic.objects.order_by('pk').values()),
+                list(Post.objects.order_by('pk').values()))
+
+    def clear(self):
+        Forum.objects.update(last_post=None)
+        for model in (Post, Topic, Forum, User):
+            model.objects.all().delete()
+
+    def test_round_trip(self):
+        """tests that an export imported into an empty database reproduces it"""
+        self.export()
+        before = self.snapshot()
+        self.clear()
+        out = StringIO()
+        call_command('import_forum_data', self.path, batch_size=7, stdout=out)
+        self.assertIn('Imported 53 records', out.getvalue())
+        self.assertEquals(self.snapshot(), before)
+        self.assertEquals(Profile.objects.count(), 5)
+        # new rows continue after the imported keys
+        user = User.objects.create(username='newcomer')
+        self.assertGreater(user.pk, 5)
+
+    def test_rebuilds_once_at_the_end(self):
+        """tests that HTML, counters and index are computed for records without them"""
+        self.export()
+        self.clear()
+        plain = os.path.join(self.directory, 'forum.ndjson')
+        with open_file(self.path, 'r') as source, open(plain, 'w') as target:
+            for line in source:
+                record = json.loads(line)
+                record.pop('message_html', None)
+                record.pop('message_hash', None)
+                target.write(json.dumps(record) + '\n')
+        call_command('import_forum_data', plain, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(message_html='').exists())
+        self.assertEquals(sum(Forum.objects.values_list('post_count', flat=True)), 40)
+        self.assertEquals(Profile.objects.get(user__username='user0').post_count,
+                          Post.objects.filter(created_by__username='user0').count())
+
+    def test_conflict(self):
+        """tests that rows clashing with existing ones stop the import with the line"""
+        self.export()
+        with self.assertRaisesMessage(CommandError, 'Line 1: inserting 5 users from there failed'):
+            call_command('import_forum_data', self.path, stdout=StringIO())
+
+    def test_invalid_line(self):
+        """tests that a malformed record names its line"""
+        bad = os.path.join(self.directory, 'bad.ndjson')
+        with open(bad, 'w') as f:
+            f.write('{"type": "forum", "id": 9, "name": "x", "description": "y"}\n{oops\n')
+        self.clear()
+        with self.assertRaisesMessage(CommandError, 'Line 2: invalid record'):
+            call_command('import_forum_data', bad, stdout=StringIO())
@@ -0,0 +1,108 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from accounts.models import Profile
+from ..models import Forum, Post, Topic
+
+
+class ForumStatsTestCase(TestCase):
+    """base test case for the denormalized forum statistics"""
+
+    def setUp(self):
+        """creates a forum with a single topic and its opening post"""
+        self.forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        self.user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        self.topic = Topic.objects.create(
+            subject='Newest topic', forum=self.forum, opener=self.user)
+        self.post = Post.objects.create(
+            message='First post', topic=self.topic, created_by=self.user)
+
+
+class ForumStatsMaintenanceTests(ForumStatsTestCase):
+    def test_counters_after_create(self):
+        """tests that creating topics and posts updates the counters"""
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.topic_count, 1)
+        self.assertEquals(self.forum.post_count, 1)
+        self.assertEquals(self.forum.last_post, self.post)
+
+    def test_reply_view_updates_counters(self):
+        """tests that replying through the view bumps the counters"""
+        self.client.login(username='john', password='123')
+        url = reverse('reply', kwargs={
+                      'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+        self.client.post(url, {'message': 'hello, world!'})
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.post_count, 2)
+        self.assertEquals(self.forum.last_post, Post.objects.latest('pk'))
+
+    def test_new_topic_view_updates_counters(self):
+        """tests that opening a topic through the view bumps the counters"""
+        self.client.login(username='john', password='123')
+        url = reverse('new_topic', kwargs={'pk': self.forum.pk})
+        self.client.post(url, {'subject': 'Another', 'message': 'Some text'})
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.topic_count, 2)
+        self.assertEquals(self.forum.post_count, 2)
+
+    def test_delete_last_post(self):
+        """tests that deleting the latest post falls back to the previous one"""
+        reply = Post.objects.create(
+            message='Reply', topic=self.topic, created_by=self.user)
+        reply.delete()
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.post_count, 1)
+        self.assertEquals(self.forum.last_post, self.post)
+
+    def test_author_post_count(self):
+        """tests that the author's profile counts their posts"""
+        reply = Post.objects.create(
+            message='Reply', topic=self.topic, created_by=self.user)
+        self.assertEquals(Profile.objects.get(user=self.user).post_count, 2)
+        reply.delete()
+        self.assertEquals(Profile.objects.get(user=self.user).post_count, 1)
+
+    def test_delete_topic(self):
+        """tests that deleting a topic removes it and its posts from the counters"""
+        Post.objects.create(
+            message='Reply', topic=self.topic, created_by=self.user)
+        self.topic.delete()
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.topic_count, 0)
+        self.assertEquals(self.forum.post_count, 0)
+        self.assertIsNone(self.forum.last_post)
+
+
+class RebuildForumStatsCommandTests(ForumStatsTestCase):
+    def test_rebuild(self):
+        """tests that the command repairs counters that drifted"""
+        Forum.objects.update(topic_count=7, post_count=0, last_post=None)
+        Profile.objects.all().delete()
+        call_command('rebuild_forum_stats', stdout=StringIO())
+        self.forum.refresh_from_db()
+        self.assertEquals(self.forum.topic_count, 1)
+        self.assertEquals(self.forum.post_count, 1)
+        self.assertEquals(self.forum.last_post, self.post)
+        self.assertEquals(Profile.objects.get(user=self.user).post_count, 1)
+
+
+class HomeQueryCountTests(ForumStatsTestCase):
+    def test_constant_queries(self):
+        """tests that the home page query count does not grow with the forums"""
+        url = reverse('home')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                forum = Forum.objects.create(name=f'Forum {i}', description='More')
+                topic = Topic.objects.create(
+                    subject='Topic', forum=forum, opener=self.user)
+                Post.objects.create(message='Post', topic=topic,
+                                    created_by=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'By john at')
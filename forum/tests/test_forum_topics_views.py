@@ -1,7 +1,9 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 from django.urls import reverse, resolve
 from ..views import TopicListView
-from ..models import Forum
+from ..models import Forum, Post, Topic
+from .helpers import QueryBudgetMixin
 
 
 class ForumTopicsTests(TestCase):
@@ -35,3 +37,36 @@ class ForumTopicsTests(TestCase):
         response = self.client.get(forum_topics_url)
         self.assertContains(response, 'href="{0}"'.format(hompage_url))
         self.assertContains(response, 'href="{0}"'.format(new_topic_url))
+
+
+@override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class ForumTopicsQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        """creates a forum with topics opened by different users"""
+        self.forum = Forum.objects.create(
+            name="Banter", description="This forum is about random banter.")
+        self.url = reverse('forum_topics', kwargs={'pk': self.forum.pk})
+
+    def add_topics(self, count):
+        for i in range(count):
+            user = User.objects.create(username=f'user{Topic.objects.count()}')
+            topic = Topic.objects.create(
+                subject=f'Topic {i}', forum=self.forum, opener=user)
+            Post.objects.create(message='Opening post', topic=topic, created_by=user)
+
+    def test_query_budget(self):
+        """tests that the topic list does not query once per topic"""
+        self.add_topics(2)
+        with self.assertMaxQueries(4):
+            self.client.get(self.url)
+        self.add_topics(20)
+        with self.assertMaxQueries(4):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'user21')
+
+    def test_lists_current_page_only(self):
+        """tests that only the paginated topics are rendered"""
+        self.add_topics(30)
+        response = self.client.get(self.url)
+        self.assertEquals(len(response.context['topics']), 25)
+        self.assertContains(response, '<tr>', 26)
@@ -0,0 +1,202 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .. import jobs
+from ..management.commands.run_jobs import Command as RunJobsCommand
+from ..models import Job
+
+calls = []
+
+
+@jobs.task
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(max_attempts=2)
+def fail(value):
+    raise ValueError(value)
+
+
+@jobs.task
+def expire_leases():
+    """stands in for a job that ran longer than the lease"""
+    Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+
+@jobs.task
+def steal_records():
+    """stands in for another worker claiming the record jobs after their lease ran out"""
+    Job.objects.filter(task=record.name).update(locked_by='other')
+
+
+@jobs.task
+def check_lease():
+    calls.append(Job.objects.get(task=check_lease.name).locked_until > timezone.now())
+
+
+@override_settings(JOBS_RETRY_DELAY=10, JOBS_LEASE_SECONDS=60)
+class JobsTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay(self):
+        """tests that delay only queues the call, and a worker runs and deletes it"""
+        record.delay(value='a')
+        self.assertEquals(calls, [])
+        self.assertEquals(jobs.work(burst=True), 1)
+        self.assertEquals(calls, ['a'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_batches(self):
+        """tests that jobs are claimed a batch at a time, oldest first"""
+        for value in range(5):
+            record.delay(value=value)
+        claimed = jobs.claim('worker', 2)
+        self.assertEquals([job.kwargs['value'] for job in claimed], [0, 1])
+        self.assertEquals(jobs.work(batch_size=2, burst=True), 3)
+        self.assertEquals(calls, [2, 3, 4])
+
+    def test_leased(self):
+        """tests that another worker leaves leased jobs alone until the lease runs out"""
+        record.delay(value='a')
+        self.assertEquals(len(jobs.claim('first', 10)), 1)
+        self.assertEquals(jobs.claim('second', 10), [])
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEquals(len(jobs.claim('second', 10)), 1)
+        self.assertEquals(Job.objects.get().attempts, 2)
+
+    def test_retry(self):
+        """tests that a failing job is kept and retried later with its error"""
+        job = fail.delay(value='boom')
+        with self.assertLogs('forum.jobs', 'WARNING'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEquals(job.attempts, 1)
+        self.assertIsNone(job.failed_at)
+        self.assertIsNone(job.locked_until)
+        self.assertIn('ValueError: boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+    def test_gives_up(self):
+        """tests that a job is marked failed after its task's max attempts"""
+        job = fail.delay(value='boom')
+        with self.assertLogs('forum.jobs', 'WARNING') as logs:
+            for _ in range(3):
+                Job.objects.update(run_at=timezone.now())
+                jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEquals(job.attempts, 2)
+        self.assertIsNotNone(job.failed_at)
+        self.assertEquals(len(logs.records), 2)
+
+    def test_unknown_task(self):
+        """tests that a job of a task that no longer exists fails at once"""
+        job = Job.objects.create(task='forum.tasks.removed')
+        with self.assertLogs('forum.jobs', 'ERROR'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.failed_at)
+
+    def test_lease_renewed(self):
+        """tests that each job of a batch starts with a full lease"""
+        expire_leases.delay()
+        check_lease.delay()
+        self.assertEquals(jobs.run_batch('worker', 10), 2)
+        self.assertEquals(calls, [True])
+        self.assertFalse(Job.objects.exists())
+
+    def test_lease_lost(self):
+        """tests that a job another worker took over is neither run nor deleted"""
+        steal_records.delay()
+        record.delay(value='a')
+        with self.assertLogs('forum.jobs', 'WARNING'):
+            self.assertEquals(jobs.run_batch('worker', 10), 2)
+        self.assertEquals(calls, [])
+        self.assertEquals(list(Job.objects.values_list('task', 'locked_by')),
+                          [(record.name, 'other')])
+
+    def test_retry_keeps_other_lease(self):
+        """tests that a late failure does not touch a job another worker holds"""
+        fail.delay(value='boom')
+        job, = jobs.claim('first', 10)
+        Job.objects.update(locked_by='second')
+        jobs.retry(job, 'late error')
+        job.refresh_from_db()
+        self.assertEquals((job.locked_by, job.last_error), ('second', ''))
+
+    def test_database_error(self):
+        """tests that a worker logs a failed round and carries on"""
+        with mock.patch.object(jobs, 'run_batch', side_effect=[
+                OperationalError('database is locked'), 2, 0]):
+            with self.assertLogs('forum.jobs', 'ERROR') as logs:
+                self.assertEquals(jobs.work(poll_interval=0, burst=True), 2)
+        self.assertIn('database is locked', logs.output[0])
+
+    def test_claim_writes_first(self):
+        """tests that without SKIP LOCKED a claim is a single UPDATE, then the read"""
+        if connection.features.has_select_for_update_skip_locked:
+            self.skipTest('the database has SKIP LOCKED')
+        record.delay(value='a')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEquals(len(jobs.claim('worker', 10)), 1)
+        self.assertTrue(captured[0]['sql'].startswith('UPDATE'))
+        self.assertEquals(len(captured), 2)
+
+    def test_command(self):
+        """tests that run_jobs --burst runs what is due and exits"""
+        record.delay(value='a')
+        record.delay(value='b')
+        out = StringIO()
+        call_command('run_jobs', burst=True, batch_size=1, stdout=out)
+        self.assertEquals(calls, ['a', 'b'])
+        self.assertIn('Ran 2 jobs', out.getvalue())
+
+
+class FakeProcess:
+    """a worker process that exits at once the first time, then runs until terminated"""
+    started = []
+
+    def __init__(self, target, kwargs):
+        self.pid = len(self.started) + 1
+        self.exitcode = None
+
+    def start(self):
+        self.started.append(self)
+        self.alive = len(self.started) > 1
+        self.exitcode = None if self.alive else 1
+        if self.alive:
+            # the command is stopped once the replacement is running
+            self.stopping.set()
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.alive = False
+        self.exitcode = -15
+
+
+class RunWorkersTests(SimpleTestCase):
+    def test_respawn(self):
+        """tests that a worker that exits unasked is replaced, and none once stopping"""
+        FakeProcess.started = []
+        FakeProcess.stopping = stopping = threading.Event()
+        context = mock.Mock(Process=FakeProcess)
+        stderr = StringIO()
+        command = RunJobsCommand(stdout=StringIO(), stderr=stderr)
+        with mock.patch('multiprocessing.get_context', return_value=context), \
+                mock.patch('forum.management.commands.run_jobs.connections'):
+            command.run_workers(1, {}, stopping)
+        self.assertEquals(len(FakeProcess.started), 2)
+        self.assertIn('Worker 1 exited with code 1, starting another',
+                      stderr.getvalue())
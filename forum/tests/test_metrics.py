@@ -0,0 +1,76 @@
+import re
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from mydjangoapp.urls import urlpatterns as project_urlpatterns
+from .. import metrics
+from ..async_views import AsyncPostListView
+from ..counters import topic_views
+from ..models import Forum, Post, Topic
+
+urlpatterns = [
+    path('metrics/', metrics.metrics, name='metrics'),
+    path('async/<int:pk>/topics/<int:topic_pk>/', AsyncPostListView.as_view(),
+         name='async_topic_posts'),
+] + project_urlpatterns
+
+SERVER_TIMING = re.compile(
+    r'sql;dur=[\d.]+;desc="(\d+) queries", tpl;dur=([\d.]+), total;dur=[\d.]+')
+
+
+@override_settings(ROOT_URLCONF=__name__, CACHE_PAGE_SECONDS=0,
+                   TOPIC_VIEWS_FLUSH_INTERVAL=3600,
+                   MIDDLEWARE=['forum.metrics.MetricsMiddleware', *settings.MIDDLEWARE])
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # as ForumConfig.ready does when REQUEST_METRICS is on
+        metrics.install()
+        super().setUpClass()
+
+    def setUp(self):
+        topic_views.flush()
+        metrics.reset()
+        user = User.objects.create_user(username='john', password='123')
+        self.forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(subject='Timed', forum=self.forum, opener=user)
+        Post.objects.create(message='Post', topic=self.topic, created_by=user)
+        self.kwargs = {'pk': self.forum.pk, 'topic_pk': self.topic.pk}
+
+    def test_server_timing(self):
+        """tests that the header reports the queries and template time of the request"""
+        response = self.client.get(reverse('topic_posts', kwargs=self.kwargs))
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match)
+        self.assertGreater(int(match.group(1)), 0)
+        self.assertGreater(float(match.group(2)), 0)
+
+    async def test_async_view(self):
+        """tests that queries run in sync_to_async threads are counted"""
+        response = await self.async_client.get(
+            reverse('async_topic_posts', kwargs=self.kwargs))
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertGreater(int(match.group(1)), 0)
+
+    def test_prometheus_endpoint(self):
+        """tests that requests are aggregated per url name"""
+        self.client.get(reverse('topic_posts', kwargs=self.kwargs))
+        self.client.get(reverse('topic_posts', kwargs=self.kwargs))
+        self.client.get(reverse('forum_topics', kwargs={'pk': self.forum.pk}))
+        response = self.client.get(reverse('metrics'))
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE forum_request_duration_seconds histogram', body)
+        self.assertIn('forum_request_duration_seconds_count{view="topic_posts"} 2', body)
+        self.assertIn('forum_request_sql_queries_count{view="forum_topics"} 1', body)
+        self.assertIn('forum_request_template_duration_seconds_bucket'
+                      '{view="topic_posts",le="+Inf"} 2', body)
+
+
+class MetricsDisabledTests(TestCase):
+    def test_no_header(self):
+        """tests that nothing is measured unless REQUEST_METRICS adds the middleware"""
+        self.assertNotIn('forum.metrics.MetricsMiddleware', settings.MIDDLEWARE)
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('Server-Timing', response)
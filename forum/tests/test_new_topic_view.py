@@ -1,3 +1,5 @@
+from unittest import mock
+from django.db import DatabaseError
 from django.test import TestCase
 from django.urls import reverse, resolve
 from ..views import new_topic
@@ -56,6 +58,16 @@ class NewTopicTests(TestCase):
         self.assertTrue(Topic.objects.exists())
         self.assertTrue(Post.objects.exists())
 
+    def test_new_topic_is_atomic(self):
+        """tests that the topic is rolled back when its first post fails"""
+        url = reverse('new_topic', kwargs={'pk': 1})
+        data = {'subject': 'Test subject', 'message': 'Some random text'}
+        with mock.patch.object(Post.objects, 'create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(url, data)
+        self.assertFalse(Topic.objects.exists())
+        self.assertEquals(Forum.objects.get(pk=1).topic_count, 0)
+
     def test_new_topic_invalid_post(self):
         """
         test case for when the post contains invalid data
@@ -0,0 +1,141 @@
+import hashlib
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..counters import topic_views
+from ..models import Forum, Post, Topic
+
+
+@override_settings(CACHE_PAGE_SECONDS=300, TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        """creates two forums with a topic each"""
+        cache.clear()
+        caches['viewers'].clear()
+        self.user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        self.forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(
+            subject='First topic', forum=self.forum, opener=self.user)
+        self.post = Post.objects.create(
+            message='First post', topic=self.topic, created_by=self.user)
+        self.other_forum = Forum.objects.create(name='Other', description='Other')
+        self.other_topic = Topic.objects.create(
+            subject='Other topic', forum=self.other_forum, opener=self.user)
+        Post.objects.create(message='Other post', topic=self.other_topic,
+                            created_by=self.user)
+        self.topic_url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+        self.other_topic_url = reverse('topic_posts', kwargs={
+            'pk': self.other_forum.pk, 'topic_pk': self.other_topic.pk})
+        self.forum_url = reverse('forum_topics', kwargs={'pk': self.forum.pk})
+
+    def assertCached(self, url, freshness_queries=1):
+        """
+        fetches url twice, asserting the second read only runs the
+        conditional GET freshness check against the forum tables
+        """
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEquals(response.status_code, 200)
+        self.assertIsNone(response.context)
+        self.assertEquals(
+            len([query for query in captured if 'forum_' in query['sql']]),
+            freshness_queries)
+        return response
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_pages_are_cached(self):
+        """tests that repeated anonymous reads skip the database"""
+        self.client.get(self.topic_url)
+        self.assertCached(reverse('home'), freshness_queries=0)
+        for url in (self.forum_url, self.topic_url):
+            self.assertCached(url)
+
+    def test_authenticated_not_cached(self):
+        """tests that logged in users always get a rendered page"""
+        self.client.login(username='john', password='123')
+        self.client.get(self.forum_url)
+        response = self.client.get(self.forum_url)
+        self.assertIsNotNone(response.context)
+
+    def test_reply_invalidates_topic(self):
+        """tests that a reply shows up at once and only expires its own pages"""
+        self.assertCached(self.topic_url)
+        self.assertCached(self.other_topic_url)
+        User.objects.create_user(username='jane', email='jane@doe.com', password='123')
+        self.client.login(username='jane', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('reply', kwargs={
+                'pk': self.forum.pk, 'topic_pk': self.topic.pk}), {'message': 'Fresh reply'})
+        self.client.logout()
+        self.assertContains(self.client.get(self.topic_url), 'Fresh reply')
+        self.assertIsNone(self.client.get(self.other_topic_url).context)
+
+    def test_reply_invalidates_author_threads(self):
+        """tests that a reply updates the author's post count on their other threads"""
+        self.assertContains(self.assertCached(self.other_topic_url), 'Posts: 2')
+        self.client.login(username='john', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('reply', kwargs={
+                'pk': self.forum.pk, 'topic_pk': self.topic.pk}), {'message': 'Fresh reply'})
+        self.client.logout()
+        self.assertContains(self.client.get(self.other_topic_url), 'Posts: 3')
+
+    def test_email_change_invalidates_author_threads(self):
+        """tests that a new email address shows its avatar on the author's threads"""
+        self.assertCached(self.other_topic_url)
+        self.client.login(username='john', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('my_account'), {
+                'first_name': '', 'last_name': '', 'email': 'jane@doe.com'})
+        self.client.logout()
+        response = self.client.get(self.other_topic_url)
+        self.assertContains(response, hashlib.md5(b'jane@doe.com').hexdigest())
+
+    def test_edit_invalidates_topic(self):
+        """tests that an edited post is never served stale"""
+        self.assertCached(self.topic_url)
+        self.client.login(username='john', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('edit', kwargs={
+                'pk': self.forum.pk, 'topic_pk': self.topic.pk, 'post_pk': self.post.pk}),
+                {'message': 'Edited post'})
+        self.client.logout()
+        self.assertContains(self.client.get(self.topic_url), 'Edited post')
+
+    def test_new_topic_invalidates_forum(self):
+        """tests that a new topic is listed at once"""
+        self.assertCached(self.forum_url)
+        self.assertCached(reverse('home'), freshness_queries=0)
+        self.client.login(username='john', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('new_topic', kwargs={'pk': self.forum.pk}),
+                             {'subject': 'Brand new topic', 'message': 'Hello'})
+        self.client.logout()
+        self.assertContains(self.client.get(self.forum_url), 'Brand new topic')
+        self.assertContains(self.client.get(reverse('home')), '<td class="align-middle">\n                        2\n')
+
+    def test_invalidated_on_commit(self):
+        """tests that pages are only expired once the write commits"""
+        self.assertCached(self.topic_url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Post.objects.create(message='Uncommitted', topic=self.topic, created_by=self.user)
+        self.assertIsNone(self.client.get(self.topic_url).context)
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.client.get(self.topic_url), 'Uncommitted')
+
+    def test_cache_hit_counts_view(self):
+        """tests that a cached thread still counts a new visitor"""
+        topic_views.flush()
+        self.client.get(self.topic_url)
+        self.client.get(self.topic_url, REMOTE_ADDR='10.0.0.2')
+        self.assertEquals(topic_views.pending(self.topic.pk), 2)
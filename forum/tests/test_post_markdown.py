@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from ..models import Forum, Post, Topic
+
+
+class PostMarkdownTestCase(TestCase):
+    """base test case for the stored markdown rendering of posts"""
+
+    def setUp(self):
+        """creates a topic with a single markdown post, as if committed"""
+        self.forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        self.user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic = Topic.objects.create(
+                subject='Newest topic', forum=self.forum, opener=self.user)
+            self.post = Post.objects.create(
+                message='**bold**', topic=self.topic, created_by=self.user)
+
+
+class StoredMarkdownTests(PostMarkdownTestCase):
+    def test_rendered_on_save(self):
+        """tests that saving a post stores its rendered HTML"""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEquals(post.message_html, '<p><strong>bold</strong></p>')
+        self.assertEquals(post.message_hash, post.get_message_hash())
+
+    def test_rerendered_on_edit(self):
+        """tests that editing the message through the view refreshes the HTML"""
+        self.client.login(username='john', password='123')
+        url = reverse('edit', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk, 'post_pk': self.post.pk})
+        self.client.post(url, {'message': '*edited*'})
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEquals(post.message_html, '<p><em>edited</em></p>')
+
+    def test_no_markdown_on_read(self):
+        """tests that displaying a thread does not render markdown"""
+        url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+        with mock.patch('forum.models.markdown') as markdown:
+            response = self.client.get(url)
+        markdown.assert_not_called()
+        self.assertContains(response, '<strong>bold</strong>')
+
+
+class RenderPostMarkdownCommandTests(PostMarkdownTestCase):
+    def test_backfill(self):
+        """tests that the command renders posts created without HTML"""
+        Post.objects.update(message_html='', message_hash='')
+        call_command('render_post_markdown', batch_size=1, stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEquals(post.message_html, '<p><strong>bold</strong></p>')
+        self.assertEquals(post.message_hash, post.get_message_hash())
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from mydjangoapp.urls import urlpatterns as project_urlpatterns
+from ..counters import topic_views
+from ..models import Forum, Post, Topic
+from ..querydetector import RepeatedQueries, fingerprint
+from .helpers import QueryBudgetMixin
+
+
+def forum_names(request):
+    """lists the forum of every topic without select_related"""
+    template = Template('{% for topic in topics %}\n{{ topic.forum.name }}{% endfor %}')
+    return HttpResponse(template.render(Context({'topics': Topic.objects.all()})))
+
+
+urlpatterns = [
+    path('forum-names/', forum_names, name='forum_names'),
+] + project_urlpatterns
+
+DETECTOR = ['forum.querydetector.QueryDetectorMiddleware']
+
+
+class FingerprintTests(TestCase):
+    def test_values_are_folded(self):
+        """tests that queries differing only in values share a fingerprint"""
+        self.assertEquals(
+            fingerprint('SELECT * FROM "forum_post"  WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            'SELECT * FROM "forum_post" WHERE "id" IN (...) LIMIT ?')
+        self.assertEquals(fingerprint("SELECT * FROM t WHERE name = 'it''s' AND T2.id = 7"),
+                          'SELECT * FROM t WHERE name = ? AND T2.id = ?')
+
+
+def create_topics(forum, count):
+    for i in range(count):
+        user = User.objects.create(username=f'{forum.name}{i}')
+        topic = Topic.objects.create(subject=f'Topic {i}', forum=forum, opener=user)
+        Post.objects.create(message=f'Post {i}', topic=topic, created_by=user)
+    return topic
+
+
+@override_settings(ROOT_URLCONF=__name__, CACHE_PAGE_SECONDS=0,
+                   TOPIC_VIEWS_FLUSH_INTERVAL=3600, MIDDLEWARE=settings.MIDDLEWARE + DETECTOR)
+class QueryDetectorTests(TestCase):
+    def setUp(self):
+        topic_views.flush()
+        self.forum = Forum.objects.create(name='Banter', description='Banter')
+        create_topics(self.forum, 6)
+
+    @override_settings(QUERY_DETECTOR='raise')
+    def test_raises_with_origin(self):
+        """tests that a query per row fails the request, naming the template line"""
+        with self.assertRaises(RepeatedQueries) as raised:
+            self.client.get(reverse('forum_names'))
+        message = str(raised.exception)
+        self.assertIn('6 x SELECT', message)
+        self.assertIn('line 2 via forum/tests/test_query_detector.py', message)
+
+    @override_settings(QUERY_DETECTOR='log')
+    def test_logs(self):
+        """tests that the log mode warns but serves the page"""
+        with self.assertLogs('forum.queries', 'WARNING') as logs:
+            response = self.client.get(reverse('forum_names'))
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('Repeated queries in GET /forum-names/', logs.output[0])
+
+    @override_settings(QUERY_DETECTOR='log', SLOW_QUERY_MS=0)
+    def test_slow_queries(self):
+        """tests that queries over SLOW_QUERY_MS are logged"""
+        with self.assertLogs('forum.queries', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+        self.assertIn('Slow query in GET /', logs.output[0])
+
+
+@override_settings(CACHE_PAGE_SECONDS=0, TOPIC_VIEWS_FLUSH_INTERVAL=3600, POSTS_PER_PAGE=20)
+class HotPagesTests(QueryBudgetMixin, TestCase):
+    """the listings run a fixed number of queries however many rows they show"""
+
+    def setUp(self):
+        topic_views.flush()
+        forums = [Forum.objects.create(name=f'Forum{i}', description='Forum')
+                  for i in range(6)]
+        for forum in forums:
+            self.topic = create_topics(forum, 6)
+        for i in range(10):
+            user = User.objects.create(username=f'replier{i}')
+            Post.objects.create(message=f'Reply {i}', topic=self.topic, created_by=user)
+        self.forum = forums[-1]
+
+    def get_pages(self):
+        for url in (reverse('home'),
+                    reverse('forum_topics', kwargs={'pk': self.forum.pk}),
+                    reverse('topic_posts', kwargs={'pk': self.forum.pk,
+                                                   'topic_pk': self.topic.pk})):
+            with self.assertNoRepeatedQueries(threshold=3):
+                self.assertEquals(self.client.get(url).status_code, 200)
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_anonymous(self):
+        """tests that no page queries per row for visitors"""
+        self.get_pages()
+
+    def test_logged_in(self):
+        """tests that no page queries per row for a logged in user"""
+        self.client.force_login(User.objects.get(username='replier0'))
+        self.get_pages()
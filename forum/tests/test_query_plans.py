@@ -0,0 +1,37 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from ..models import Forum, Post, Topic
+from ..queryplans import plan_problems
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        """tests that the check passes against the migrated schema"""
+        user = User.objects.create_user(username='john', password='123')
+        forum = Forum.objects.create(name='Banter', description='Banter')
+        topic = Topic.objects.create(subject='Plans', forum=forum, opener=user)
+        Post.objects.create(message='Post', topic=topic, created_by=user)
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('All 8 hot query plans are served by indexes', out.getvalue())
+
+    def test_sqlite_problems(self):
+        """tests that full scans and temp sorts are found in SQLite plans"""
+        plan = ('2 0 0 SCAN forum_topic\n'
+                '5 0 0 SEARCH forum_post USING INDEX post_topic_created_at_idx (topic_id=?)\n'
+                '9 0 0 USE TEMP B-TREE FOR ORDER BY')
+        self.assertEquals(plan_problems('sqlite', plan), ['sequential scan', 'temp sort'])
+        self.assertEquals(plan_problems(
+            'sqlite', '2 0 0 SCAN forum_post USING INDEX post_topic_created_at_idx'), [])
+
+    def test_postgresql_problems(self):
+        """tests that seq scans and sort nodes are found in PostgreSQL plans"""
+        plan = ('Limit  (cost=10.1..10.2 rows=25 width=8)\n'
+                '  ->  Sort  (cost=10.1..10.2 rows=40 width=8)\n'
+                '        Sort Key: last_updated DESC\n'
+                '        ->  Seq Scan on forum_topic  (cost=0.0..9.0 rows=40 width=8)')
+        self.assertEquals(plan_problems('postgresql', plan), ['sequential scan', 'temp sort'])
+        self.assertEquals(plan_problems(
+            'postgresql', 'Index Scan using topic_forum_last_updated_idx on forum_topic'), [])
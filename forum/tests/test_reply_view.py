@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse, resolve
+from ..counters import topic_views
 from ..forms import PostForm
 from ..models import Forum, Post, Topic
 from ..views import reply
@@ -72,11 +75,16 @@ class SuccessfulReplyTests(ReplyTestCase):
         self.response = self.client.post(
             self.url, {'message': 'hello, world!'})
 
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
     def test_redirection(self):
         """tests that a valid form submission should redirect the user"""
         topic_posts_url = reverse('topic_posts', kwargs={
                                   'pk': self.forum.pk, 'topic_pk': self.topic.pk})
-        self.assertRedirects(self.response, topic_posts_url)
+        post = Post.objects.latest('pk')
+        self.assertRedirects(self.response, f'{topic_posts_url}?page=last#{post.pk}')
 
     def test_reply_created(self):
         """
@@ -87,6 +95,30 @@ class SuccessfulReplyTests(ReplyTestCase):
         self.assertEquals(Post.objects.count(), 2)
 
 
+class ReplyWriteTests(ReplyTestCase):
+    def setUp(self):
+        """logs in the replying user"""
+        super().setUp()
+        self.client.login(username=self.username, password=self.password)
+
+    def test_minimal_writes(self):
+        """tests that a reply only bumps last_updated and counts nothing"""
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(self.url, {'message': 'hello, world!'})
+        sql = [query['sql'] for query in captured]
+        self.assertFalse([query for query in sql if 'COUNT(' in query])
+        topic_updates = [query for query in sql if query.startswith('UPDATE "forum_topic"')]
+        self.assertEquals(len(topic_updates), 1)
+        self.assertNotIn('"subject"', topic_updates[0])
+
+    def test_last_updated(self):
+        """tests that the topic moves to the time of the reply"""
+        self.client.post(self.url, {'message': 'hello, world!'})
+        post = Post.objects.latest('pk')
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.last_updated, post.created_at)
+
+
 class InvalidReplyTests(ReplyTestCase):
     def setUp(self):
         """
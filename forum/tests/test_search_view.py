@@ -0,0 +1,156 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import resolve, reverse
+from ..models import Forum, Post, Topic
+from ..search import search
+from ..views import search as search_view
+
+
+class SearchTestCase(TestCase):
+    """base test case for full-text search"""
+
+    def setUp(self):
+        """creates topics about different subjects, indexed as if committed"""
+        self.forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        self.user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic = Topic.objects.create(
+                subject='Gardening tips', forum=self.forum, opener=self.user)
+            self.post = Post.objects.create(
+                message='Tomatoes need plenty of sun and water.', topic=self.topic,
+                created_by=self.user)
+            other = Topic.objects.create(
+                subject='Football', forum=self.forum, opener=self.user)
+            Post.objects.create(message='What a match yesterday!', topic=other,
+                                created_by=self.user)
+
+
+class SearchTests(SearchTestCase):
+    def test_finds_post(self):
+        """tests that a post is found by a word of its message"""
+        results, has_next = search('tomatoes')
+        self.assertEquals([(r.kind, r.post_id) for r in results], [('post', self.post.pk)])
+        self.assertEquals(results[0].topic, self.topic)
+        self.assertIn('<mark>Tomatoes</mark>', results[0].snippet)
+        self.assertFalse(has_next)
+
+    def test_finds_topic(self):
+        """tests that a topic is found by its subject"""
+        results, _ = search('gardening')
+        self.assertEquals([(r.kind, r.topic_id) for r in results], [('topic', self.topic.pk)])
+
+    def test_index_follows_edits(self):
+        """tests that edited and deleted posts are reindexed once committed"""
+        self.post.message = 'Peppers like the heat.'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+            self.assertEquals(len(search('tomatoes')[0]), 1)
+        self.assertEquals(search('tomatoes')[0], [])
+        self.assertEquals(len(search('peppers')[0]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEquals(search('peppers')[0], [])
+
+    def test_snippet_is_escaped(self):
+        """tests that markup in a message is escaped in the snippet"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(message='<script>alert(1)</script> sunflower',
+                                topic=self.topic, created_by=self.user)
+        snippet = search('sunflower')[0][0].snippet
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+
+    def test_query_syntax_is_quoted(self):
+        """tests that FTS operators in the query are treated as words"""
+        self.assertEquals(search('"tomatoes (')[0][0].post_id, self.post.pk)
+        self.assertEquals(search('tomatoes OR cricket')[0], [])
+
+    def test_control_characters(self):
+        """tests that NUL and other control characters are dropped from the query"""
+        self.assertEquals(search('\x00')[0], [])
+        self.assertEquals(search('\x00\x02tomatoes\x03')[0][0].post_id, self.post.pk)
+
+    def test_topics_first(self):
+        """tests that topic matches come before post matches, whatever their scores"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(message='Gardening gardening gardening', topic=self.topic,
+                                created_by=self.user)
+        results, _ = search('gardening')
+        self.assertEquals([r.kind for r in results], ['topic', 'post'])
+
+    def test_pagination(self):
+        """tests that results are split into pages"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Post.objects.create(message=f'More tomatoes {i}', topic=self.topic,
+                                    created_by=self.user)
+        first, has_next = search('tomatoes', page=1, per_page=3)
+        second, more = search('tomatoes', page=2, per_page=3)
+        self.assertTrue(has_next)
+        self.assertFalse(more)
+        self.assertEquals(len(first) + len(second), 4)
+
+
+@mock.patch.dict('forum.search.BACKENDS', clear=True)
+class FallbackSearchTests(SearchTestCase):
+    def test_saves_without_index(self):
+        """tests that posts are saved and deleted on databases without a backend"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(message='Cucumbers too', topic=self.topic,
+                                       created_by=self.user)
+            post.delete()
+
+    def test_finds_topic_and_post(self):
+        """tests that the substring search finds topics first, then posts"""
+        Post.objects.create(message='Gardening in the rain', topic=self.topic,
+                            created_by=self.user)
+        results, has_next = search('GARDENING')
+        self.assertEquals([r.kind for r in results], ['topic', 'post'])
+        self.assertIn('<mark>Gardening</mark>', results[1].snippet)
+        self.assertFalse(has_next)
+
+    def test_pagination(self):
+        """tests that pages continue from topics into posts"""
+        for i in range(3):
+            Post.objects.create(message=f'Gardening note {i}', topic=self.topic,
+                                created_by=self.user)
+        first, has_next = search('gardening', page=1, per_page=2)
+        second, more = search('gardening', page=2, per_page=2)
+        self.assertTrue(has_next)
+        self.assertFalse(more)
+        self.assertEquals([r.kind for r in first + second], ['topic', 'post', 'post', 'post'])
+
+    def test_snippet(self):
+        """tests that the excerpt is escaped, marked and cut around the first match"""
+        Post.objects.create(message='x' * 200 + ' <b>sunflower</b> ' + 'y' * 200,
+                            topic=self.topic, created_by=self.user)
+        snippet = search('sunflower')[0][0].snippet
+        self.assertIn('&lt;b&gt;<mark>sunflower</mark>&lt;/b&gt;', snippet)
+        self.assertTrue(snippet.startswith('…') and snippet.endswith('…'))
+
+
+class SearchViewTests(SearchTestCase):
+    def test_view_function(self):
+        """tests that the search URL resolves the search view"""
+        self.assertEquals(resolve('/search/').func, search_view)
+
+    def test_results(self):
+        """tests that matching topics are listed and linked"""
+        response = self.client.get(reverse('search'), {'q': 'tomatoes'})
+        topic_url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+        self.assertContains(response, f'href="{topic_url}"')
+        self.assertContains(response, '<mark>Tomatoes</mark>')
+
+    def test_nul_byte(self):
+        """tests that a NUL byte in the query finds nothing instead of failing"""
+        response = self.client.get(reverse('search'), {'q': '\x00'})
+        self.assertEquals(response.status_code, 200)
+
+    def test_no_results(self):
+        """tests the message shown when nothing matches"""
+        response = self.client.get(reverse('search'), {'q': 'cricket'})
+        self.assertContains(response, 'No topics or posts match')
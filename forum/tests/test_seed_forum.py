@@ -0,0 +1,54 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Max, Sum
+from django.test import TestCase
+from ..models import Forum, Post, Topic
+
+
+class SeedForumTests(TestCase):
+    def seed(self, **options):
+        options = {'forums': 3, 'topics': 20, 'posts': 200, 'users': 15, **options}
+        call_command('seed_forum', stdout=StringIO(), **options)
+
+    def test_counts(self):
+        """tests that the requested numbers of rows are created"""
+        self.seed()
+        self.assertEquals(Forum.objects.count(), 3)
+        self.assertEquals(Topic.objects.count(), 20)
+        self.assertEquals(Post.objects.count(), 200)
+        self.assertEquals(User.objects.count(), 15)
+        self.assertTrue(User.objects.get(username='user0').check_password('password'))
+
+    def test_skewed_and_consistent(self):
+        """tests that the stats are rebuilt and a few threads hold most posts"""
+        self.seed()
+        totals = Forum.objects.aggregate(topics=Sum('topic_count'), posts=Sum('post_count'))
+        self.assertEquals(totals, {'topics': 20, 'posts': 200})
+        lengths = sorted(Topic.objects.annotate(length=Count('posts')).values_list(
+            'length', flat=True), reverse=True)
+        self.assertGreaterEqual(lengths[-1], 1)
+        self.assertGreater(lengths[0], 200 / 20)
+        topic = Topic.objects.annotate(latest=Max('posts__created_at')).first()
+        self.assertEquals(topic.last_updated, topic.latest)
+        self.assertFalse(Post.objects.filter(message_html='').exists())
+
+    def test_same_seed_same_data(self):
+        """tests that the generated data depends only on the seed"""
+        self.seed(seed=7)
+        first = list(Post.objects.order_by('pk').values_list('message', flat=True))
+        Post.objects.all().delete()
+        Topic.objects.all().delete()
+        Forum.objects.all().delete()
+        User.objects.all().delete()
+        self.seed(seed=7)
+        self.assertEquals(list(Post.objects.order_by('pk').values_list('message', flat=True)),
+                          first)
+
+    def test_refuses_non_empty_database(self):
+        """tests that an already seeded database is left alone"""
+        Forum.objects.create(name='Django', description='Django')
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.assertEquals(Topic.objects.count(), 0)
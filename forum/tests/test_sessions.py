@@ -0,0 +1,99 @@
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..checks import session_cache
+from ..counters import topic_views
+from ..models import Forum, Topic
+
+
+def create_sessions(expire_date, count):
+    Session.objects.bulk_create(
+        Session(session_key=f'{expire_date:%Y%m%d%H%M%S%f}{i:06}'.ljust(32, 'x'),
+                session_data='', expire_date=expire_date)
+        for i in range(count))
+
+
+class ClearExpiredSessionsTests(TestCase):
+    def test_batches(self):
+        """tests that only expired sessions go, in batches of the given size"""
+        now = timezone.now()
+        create_sessions(now - timedelta(days=1), 25)
+        create_sessions(now + timedelta(days=1), 3)
+        with CaptureQueriesContext(connection) as captured:
+            call_command('clear_expired_sessions', batch_size=10, stdout=StringIO())
+        deletes = [query for query in captured if query['sql'].startswith('DELETE')]
+        self.assertEquals(len(deletes), 3)
+        self.assertEquals(Session.objects.count(), 3)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_cache_engine(self):
+        """tests that nothing is deleted when sessions are not in the database"""
+        create_sessions(timezone.now() - timedelta(days=1), 2)
+        out = StringIO()
+        call_command('clear_expired_sessions', stdout=out)
+        self.assertIn('keeps no sessions in the database', out.getvalue())
+        self.assertEquals(Session.objects.count(), 2)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+                   TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class CachedSessionTests(TestCase):
+    def setUp(self):
+        topic_views.flush()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        user = User.objects.create_user(username='john', password='123')
+        forum = Forum.objects.create(name='Banter', description='Banter')
+        topic = Topic.objects.create(subject='Cached', forum=forum, opener=user)
+        self.urls = [reverse('forum_topics', kwargs={'pk': forum.pk}),
+                     reverse('topic_posts', kwargs={'pk': forum.pk, 'topic_pk': topic.pk})]
+        self.client.login(username='john', password='123')
+
+    def test_session_read_from_cache(self):
+        """tests that logged in pages do not query django_session"""
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEquals(self.client.get(url).status_code, 200)
+            self.assertFalse([query for query in captured
+                              if 'django_session' in query['sql']])
+
+    def test_sessions_cache_is_separate(self):
+        """tests that the sessions outlive a flush of the page cache"""
+        caches['default'].clear()
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        session = store(self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+        self.assertIsNotNone(caches[settings.SESSION_CACHE_ALIAS].get(session.cache_key))
+
+
+class SessionCacheCheckTests(SimpleTestCase):
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+                       WEB_CONCURRENCY=4)
+    def test_locmem(self):
+        """tests that cached sessions in a per process cache are an error"""
+        self.assertEquals([error.id for error in session_cache()], ['forum.E001'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache',
+                       WEB_CONCURRENCY=1)
+    def test_locmem_single_process(self):
+        """tests that a single process may keep sessions in its own cache"""
+        self.assertEquals(session_cache(), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache', CACHES={
+        **settings.CACHES,
+        'sessions': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared(self):
+        """tests that a shared sessions cache passes"""
+        self.assertEquals(session_cache(), [])
+
+    def test_database(self):
+        """tests that database sessions never need the cache"""
+        self.assertEquals(session_cache(), [])
@@ -0,0 +1,104 @@
+import os
+import runpy
+from unittest import mock
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from ..checks import performance_settings
+
+SETTINGS_FILE = os.path.join(settings.BASE_DIR, 'mydjangoapp', 'settings.py')
+
+
+def load_settings(**environ):
+    environ.setdefault('SECRET_KEY', 'test')
+    with mock.patch.dict(os.environ, environ):
+        return runpy.run_path(SETTINGS_FILE)
+
+
+def warning_ids():
+    return {warning.id for warning in performance_settings()}
+
+
+class SettingsProfileTests(SimpleTestCase):
+    def test_production(self):
+        """tests that the production profile turns off debug and on the fast paths"""
+        profile = load_settings(SETTINGS_PROFILE='production')
+        self.assertFalse(profile['DEBUG'])
+        self.assertEquals(profile['MIDDLEWARE'][1:3], [
+            'whitenoise.middleware.WhiteNoiseMiddleware', 'django.middleware.gzip.GZipMiddleware'])
+        options = profile['TEMPLATES'][0]['OPTIONS']
+        self.assertEquals(options['loaders'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertNotIn('django.template.context_processors.debug', options['context_processors'])
+        self.assertTrue(profile['SESSION_COOKIE_SECURE'])
+        self.assertTrue(profile['SECURE_SSL_REDIRECT'])
+        self.assertIn('Manifest', profile['STORAGES']['staticfiles']['BACKEND'])
+
+    def test_production_without_https(self):
+        """tests that HTTPS=False keeps the performance settings and drops the HTTPS ones"""
+        profile = load_settings(SETTINGS_PROFILE='production', HTTPS='False')
+        self.assertFalse(profile['DEBUG'])
+        self.assertFalse(profile['SECURE_SSL_REDIRECT'])
+        self.assertFalse(profile['CSRF_COOKIE_SECURE'])
+        self.assertEquals(profile['SECURE_HSTS_SECONDS'], 0)
+
+    def test_proxy_ssl_header(self):
+        """tests that X-Forwarded-Proto is only trusted when a proxy is declared"""
+        self.assertNotIn('SECURE_PROXY_SSL_HEADER', load_settings(SETTINGS_PROFILE='production'))
+        profile = load_settings(SETTINGS_PROFILE='production', SECURE_PROXY_SSL='True')
+        self.assertEquals(profile['SECURE_PROXY_SSL_HEADER'], ('HTTP_X_FORWARDED_PROTO', 'https'))
+
+    def test_production_secret_key(self):
+        """tests that production refuses to start without a secret key"""
+        with self.assertRaisesMessage(ImproperlyConfigured, 'SECRET_KEY'):
+            load_settings(SETTINGS_PROFILE='production', SECRET_KEY='')
+        self.assertEquals(load_settings(SECRET_KEY='')['SECRET_KEY'],
+                          'django-insecure-development-only')
+
+    def test_development(self):
+        """tests that the development profile keeps debug and the default template loaders"""
+        profile = load_settings(SETTINGS_PROFILE='development')
+        self.assertTrue(profile['DEBUG'])
+        self.assertNotIn('loaders', profile['TEMPLATES'][0]['OPTIONS'])
+        self.assertNotIn('django.middleware.gzip.GZipMiddleware', profile['MIDDLEWARE'])
+
+    def test_page_cache_per_process(self):
+        """tests that several workers may not cache pages in a per process cache"""
+        with self.assertRaisesMessage(ImproperlyConfigured, 'shared by the 4 workers'):
+            load_settings(WEB_CONCURRENCY='4', CACHE_BACKEND='locmem')
+        self.assertEquals(load_settings(
+            WEB_CONCURRENCY='4', CACHE_BACKEND='locmem', CACHE_PAGE_SECONDS='0'
+        )['CACHE_PAGE_SECONDS'], 0)
+        self.assertEquals(load_settings(
+            WEB_CONCURRENCY='4', CACHE_BACKEND='redis')['CACHES']['default']['BACKEND'],
+            'django.core.cache.backends.redis.RedisCache')
+
+
+class PerformanceChecksTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_development_values(self):
+        """tests that the development settings are reported"""
+        self.assertTrue({'forum.W001', 'forum.W003', 'forum.W004', 'forum.W005'} <= warning_ids())
+
+    @override_settings(
+        DEBUG=False, CACHE_BACKEND='redis',
+        MIDDLEWARE=['django.middleware.gzip.GZipMiddleware'] + settings.MIDDLEWARE,
+        TEMPLATES=load_settings(SETTINGS_PROFILE='production')['TEMPLATES'],
+        STORAGES=load_settings(SETTINGS_PROFILE='production')['STORAGES'])
+    def test_production_values(self):
+        """tests that nothing is reported once the production values are in place"""
+        self.assertEquals(warning_ids(), set())
+
+    @override_settings(QUERY_DETECTOR='log', CACHE_PAGE_SECONDS=0)
+    def test_development_tools(self):
+        """tests that the query detector and a disabled page cache are reported"""
+        self.assertTrue({'forum.W007', 'forum.W009'} <= warning_ids())
+
+
+@override_settings(MIDDLEWARE=['django.middleware.gzip.GZipMiddleware'] + settings.MIDDLEWARE)
+class GZipTests(TestCase):
+    def test_compressed(self):
+        """tests that pages are compressed for clients that accept gzip"""
+        response = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
@@ -0,0 +1,86 @@
+import gzip
+import shutil
+import tempfile
+from io import StringIO
+import brotli
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import AsyncClient, SimpleTestCase, override_settings
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+MIDDLEWARE = ['whitenoise.middleware.WhiteNoiseMiddleware'] + settings.MIDDLEWARE
+
+
+@override_settings(MIDDLEWARE=MIDDLEWARE, STORAGES=STORAGES)
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.root))
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+        with open(settings.BASE_DIR / 'static' / 'css' / 'bootstrap.min.css', 'rb') as file:
+            cls.bootstrap = file.read()
+
+    def test_hashed_url(self):
+        """tests that templates link to the hashed name, which is cached for good"""
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        response = self.client.get(url)
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(response['Content-Type'].startswith('text/css'))
+        self.assertEquals(response.getvalue(), self.bootstrap)
+
+    def test_brotli(self):
+        """tests that brotli is preferred when both copies exist"""
+        response = self.client.get(static('css/bootstrap.min.css'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEquals(response['Content-Encoding'], 'br')
+        self.assertEquals(brotli.decompress(response.getvalue()), self.bootstrap)
+
+    def test_gzip(self):
+        """tests that the precompressed copy is sent to clients that accept it"""
+        response = self.client.get(static('css/bootstrap.min.css'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(response['Vary'], 'Accept-Encoding')
+        content = response.getvalue()
+        self.assertEquals(gzip.decompress(content), self.bootstrap)
+        self.assertEquals(int(response['Content-Length']), len(content))
+
+    def test_unhashed_url(self):
+        """tests that the original name is served, for STATIC_MAX_AGE seconds"""
+        response = self.client.get('/static/css/bootstrap.min.css')
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response['Cache-Control'],
+                          f'max-age={settings.STATIC_MAX_AGE}, public')
+
+    def test_not_modified(self):
+        """tests that a revalidation with the same ETag gets an empty 304"""
+        url = static('css/bootstrap.min.css')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+        self.assertEquals(response.getvalue(), b'')
+
+    def test_images_not_compressed(self):
+        """tests that no compressed copies are kept of already compressed files"""
+        response = self.client.get(static('img/prism.png'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEquals(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_missing_file(self):
+        """tests that unknown files fall through to a 404"""
+        response = self.client.get('/static/css/missing.css')
+        self.assertEquals(response.status_code, 404)
+
+    async def test_async(self):
+        """tests that files are served under ASGI"""
+        response = await AsyncClient().get(static('css/bootstrap.min.css'),
+                                           headers={'Accept-Encoding': 'gzip'})
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(gzip.decompress(response.getvalue()), self.bootstrap)
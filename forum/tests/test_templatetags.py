@@ -1,6 +1,11 @@
+import hashlib
+from unittest import mock
 from django import forms
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 from ..templatetags.form_tags import field_type, input_class
+from ..templatetags.gravatar import LRUCache, gravatar, gravatar_url, url_cache
 
 
 class ExampleForm(forms.Form):
@@ -42,3 +47,44 @@ class InputClassTests(TestCase):
         """tests when the elog in form has invalid bound fields"""
         form = ExampleForm({'name': '', 'password': '123'})
         self.assertEquals('form-control is-invalid', input_class(form['name']))
+
+
+class GravatarTests(TestCase):
+    def setUp(self):
+        """empties the gravatar URL cache"""
+        url_cache.clear()
+
+    def test_url(self):
+        """tests the URL built for a user, normalising the email"""
+        user = User(email=' John@Doe.com ')
+        self.assertEquals(
+            gravatar(user),
+            'https://www.gravatar.com/avatar/6a6c19fea4a3676970167ce51f39e6ee?d=mm&s=256')
+        self.assertIn('s=64', gravatar(user, 64))
+
+    def test_memoized(self):
+        """tests that a repeated email is hashed only once"""
+        user = User(email='john@doe.com')
+        with mock.patch('forum.templatetags.gravatar.hashlib.md5',
+                        wraps=hashlib.md5) as md5:
+            gravatar(user)
+            gravatar(user)
+        self.assertEquals(md5.call_count, 1)
+
+    def test_bounded(self):
+        """tests that the least recently used URLs are evicted"""
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEquals((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_invalidated_on_email_change(self):
+        """tests that updating an account evicts the old email's URLs"""
+        User.objects.create_user(username='john', email='john@doe.com', password='123')
+        self.client.login(username='john', password='123')
+        gravatar_url('john@doe.com')
+        self.client.post(reverse('my_account'), {
+            'first_name': 'John', 'last_name': 'Doe', 'email': 'johnny@doe.com'})
+        self.assertEquals(len(url_cache), 0)
@@ -0,0 +1,89 @@
+import json
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from ..models import Forum, Post, Topic
+from .helpers import QueryBudgetMixin
+
+
+class TopicArchiveTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.moderator = User.objects.create_user(username='mod', password='123', is_staff=True)
+        author = User.objects.create_user(username='john', password='123')
+        forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(subject='Archived <topic>', forum=forum,
+                                          opener=author)
+        for i in range(7):
+            Post.objects.create(message=f'Post **{i}**', topic=self.topic,
+                                created_by=author)
+        self.url = reverse('topic_archive', kwargs={'pk': forum.pk, 'topic_pk': self.topic.pk})
+
+    def test_moderators_only(self):
+        """tests that visitors and ordinary users are sent to the login page"""
+        self.assertEquals(self.client.get(self.url).status_code, 302)
+        self.client.login(username='john', password='123')
+        self.assertEquals(self.client.get(self.url).status_code, 302)
+
+    def test_ndjson(self):
+        """tests that every post streams as one JSON line, oldest first"""
+        self.client.force_login(self.moderator)
+        with mock.patch('forum.archive.CHUNK_SIZE', 3):
+            response = self.client.get(self.url)
+            self.assertTrue(response.streaming)
+            chunks = list(response.streaming_content)
+        self.assertEquals(response['Content-Type'], 'application/x-ndjson')
+        self.assertEquals(response['Content-Disposition'],
+                          f'attachment; filename="topic-{self.topic.pk}.ndjson"')
+        self.assertEquals(len(chunks), 3)
+        records = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEquals([record['message'] for record in records],
+                          [f'Post **{i}**' for i in range(7)])
+        self.assertEquals(records[0]['author'], 'john')
+
+    def test_same_timestamp(self):
+        """tests that posts sharing a timestamp are neither lost nor repeated between batches"""
+        self.topic.posts.update(created_at=self.topic.posts.first().created_at)
+        self.client.force_login(self.moderator)
+        with mock.patch('forum.archive.CHUNK_SIZE', 2):
+            content = b''.join(self.client.get(self.url).streaming_content)
+        records = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEquals([record['id'] for record in records],
+                          list(self.topic.posts.order_by('pk').values_list('pk', flat=True)))
+
+    def test_batch_queries(self):
+        """tests that posts are read one batch per query"""
+        self.client.force_login(self.moderator)
+        with mock.patch('forum.archive.CHUNK_SIZE', 3):
+            response = self.client.get(self.url)
+            with self.assertNumQueries(3):
+                b''.join(response.streaming_content)
+
+    def test_query_count(self):
+        """tests that streaming the posts takes one query, not one per post"""
+        self.client.force_login(self.moderator)
+        response = self.client.get(self.url, {'format': 'html'})
+        with self.assertMaxQueries(1):
+            b''.join(response.streaming_content)
+
+    def test_html(self):
+        """tests that the html archive holds the escaped, rendered posts"""
+        self.client.force_login(self.moderator)
+        response = self.client.get(self.url, {'format': 'html'})
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('<h1>Archived &lt;topic&gt;</h1>', content)
+        self.assertIn('<strong>6</strong>', content)
+        self.assertTrue(content.endswith('</body></html>\n'))
+
+    def test_unknown_format(self):
+        self.client.force_login(self.moderator)
+        self.assertEquals(self.client.get(self.url, {'format': 'xml'}).status_code, 404)
+
+    async def test_asgi_streams_asynchronously(self):
+        """tests that ASGI gets an async iterator, which Django does not buffer"""
+        await sync_to_async(self.async_client.force_login)(self.moderator)
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEquals(len(content.decode().splitlines()), 7)
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import resolve, reverse
+from ..counters import topic_views
 from ..models import Forum, Post, Topic
 from ..views import PostListView
+from .helpers import QueryBudgetMixin
 
 
 class TopicPostsTests(TestCase):
@@ -28,3 +32,72 @@ class TopicPostsTests(TestCase):
         """tests the view function"""
         view = resolve('/forum/1/topics/1/')
         self.assertEquals(view.func, PostListView)
+
+
+@override_settings(POSTS_PER_PAGE=20, TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class LongTopicPostsTests(TestCase):
+    def setUp(self):
+        """initialises a topic with 10k posts"""
+        forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        user = User.objects.create_user(
+            username='john', email='john@doe.com', password='abcd12')
+        self.topic = Topic.objects.create(
+            subject='Long thread', forum=forum, opener=user)
+        Post.objects.bulk_create(
+            Post(message=f'Post number {i}', topic=self.topic, created_by=user)
+            for i in range(10000))
+        self.url = reverse('topic_posts', kwargs={
+            'pk': forum.pk, 'topic_pk': self.topic.pk})
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_renders_only_current_page(self):
+        """tests that only one page of posts is rendered"""
+        response = self.client.get(self.url, {'page': 3})
+        self.assertEquals(len(response.context['posts']), 20)
+        self.assertContains(response, 'class="card mb-2', 20)
+
+    def test_query_count(self):
+        """tests that the query count is fixed regardless of topic size"""
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {'page': 250})
+
+    def test_page_count_matches_paginator(self):
+        """tests that get_page_count agrees with the view's pagination"""
+        response = self.client.get(self.url)
+        self.assertEquals(self.topic.get_page_count(),
+                          response.context['paginator'].num_pages)
+
+
+@override_settings(POSTS_PER_PAGE=20, TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+class TopicPostsAuthorTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        """initialises a topic whose posts are written by many users"""
+        self.forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        self.topic = Topic.objects.create(
+            subject='Busy thread', forum=self.forum,
+            opener=User.objects.create_user(username='opener'))
+        self.url = reverse('topic_posts', kwargs={
+            'pk': self.forum.pk, 'topic_pk': self.topic.pk})
+
+    def add_posts(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                user = User.objects.create_user(username=f'user{User.objects.count()}')
+                Post.objects.create(message='Post', topic=self.topic, created_by=user)
+                Post.objects.create(message='Post', topic=self.topic, created_by=user)
+
+    def test_author_queries_are_fixed(self):
+        """tests that author data does not cost a query per post"""
+        self.add_posts(1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.client.cookies.clear()
+        self.add_posts(9)
+        with self.assertMaxQueries(len(small)):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Posts: 2', 20)
@@ -0,0 +1,77 @@
+import math
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..counters import topic_views
+from ..models import Forum, Topic
+from ..viewers import HyperLogLog, topic_viewers
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_within_error_bound(self):
+        """tests that estimates stay within three standard errors"""
+        error = 1.04 / math.sqrt(1 << 10)
+        for distinct in (10, 1000, 50000):
+            sketch = HyperLogLog(10)
+            for i in range(distinct):
+                sketch.add(f'viewer{i}')
+            self.assertLess(abs(sketch.estimate() - distinct), 3 * error * distinct + 1)
+
+    def test_repeat_leaves_sketch_unchanged(self):
+        """tests that adding a value twice changes the sketch once"""
+        sketch = HyperLogLog(10)
+        self.assertTrue(sketch.add('viewer'))
+        self.assertFalse(sketch.add('viewer'))
+        self.assertEquals(len(sketch.registers), 1024)
+
+
+@override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600, CACHE_PAGE_SECONDS=0)
+class UniqueViewerTests(TestCase):
+    def setUp(self):
+        caches['viewers'].clear()
+        topic_views.flush()
+        self.user = User.objects.create_user(username='john', password='123')
+        forum = Forum.objects.create(name='Banter', description='Banter')
+        self.topic = Topic.objects.create(subject='Viewed', forum=forum, opener=self.user)
+        self.url = reverse('topic_posts', kwargs={'pk': forum.pk, 'topic_pk': self.topic.pk})
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    def test_anonymous_view_writes_no_session(self):
+        """tests that counting a visitor neither creates nor saves a session"""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse([query for query in captured if 'django_session' in query['sql']])
+        self.assertEquals(topic_views.pending(self.topic.pk), 1)
+        self.assertEquals(response.context['topic'].views, 1)
+
+    def test_user_counted_once_across_sessions(self):
+        """tests that a user logging in again is not a new viewer"""
+        self.client.login(username='john', password='123')
+        self.client.get(self.url)
+        self.client.logout()
+        self.client.login(username='john', password='123')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(self.url)
+        self.assertFalse([query for query in captured
+                          if query['sql'].startswith(('INSERT', 'UPDATE'))])
+        self.assertEquals(topic_views.pending(self.topic.pk), 1)
+
+    def test_kept_apart_from_pages(self):
+        """tests that clearing the page cache does not forget who viewed a topic"""
+        self.assertEquals(topic_viewers.add(self.topic.pk, 'viewer'), 1)
+        cache.clear()
+        self.assertEquals(topic_viewers.add(self.topic.pk, 'viewer'), 0)
+
+    def test_many_viewers(self):
+        """tests that the credited views follow the number of distinct viewers"""
+        added = sum(topic_viewers.add(self.topic.pk, f'viewer{i}') for i in range(2000))
+        self.assertEquals(added, round(topic_viewers.estimate(self.topic.pk)))
+        self.assertLess(abs(added - 2000), 2000 * 3 * 1.04 / 32)
+        self.assertEquals(topic_viewers.add(self.topic.pk, 'viewer7'), 0)
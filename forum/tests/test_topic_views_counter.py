@@ -0,0 +1,80 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..counters import topic_views
+from ..models import Forum, Topic
+
+
+class TopicViewBufferTests(TestCase):
+    def setUp(self):
+        """empties the view buffer and viewer sketches and creates a topic"""
+        cache.clear()
+        caches['viewers'].clear()
+        topic_views.flush()
+        forum = Forum.objects.create(
+            name='Banter', description='This forum is about random banter.')
+        user = User.objects.create_user(
+            username='john', email='john@doe.com', password='123')
+        self.topic = Topic.objects.create(
+            subject='Newest topic', forum=forum, opener=user)
+        self.url = reverse('topic_posts', kwargs={
+            'pk': forum.pk, 'topic_pk': self.topic.pk})
+
+    def tearDown(self):
+        """writes the views the test recorded, so none are left for later tests"""
+        topic_views.flush()
+
+    @override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+    def test_views_are_buffered(self):
+        """tests that views are held in memory until flushed"""
+        for i in range(3):
+            self.client.get(self.url, REMOTE_ADDR=f'10.0.0.{i}')
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.views, 0)
+        self.assertEquals(topic_views.pending(self.topic.pk), 3)
+        with self.assertNumQueries(1):
+            topic_views.flush()
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.views, 3)
+
+    @override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=0)
+    def test_flushed_when_due(self):
+        """tests that views are written once the interval has elapsed"""
+        self.client.get(self.url)
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.views, 1)
+
+    @override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+    def test_no_topic_save_on_view(self):
+        """tests that viewing a topic does not write the topic row"""
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(self.url)
+        updates = [query['sql'] for query in captured
+                   if query['sql'].startswith('UPDATE "forum_topic"')]
+        self.assertEquals(updates, [])
+        self.assertEquals(topic_views.pending(self.topic.pk), 1)
+
+    @override_settings(TOPIC_VIEWS_FLUSH_INTERVAL=3600)
+    def test_discard(self):
+        """tests that discarded views are never written"""
+        topic_views.add(self.topic.pk, 3)
+        self.assertEquals(topic_views.discard(), 3)
+        self.assertEquals(topic_views.pending(self.topic.pk), 0)
+        topic_views.flush()
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.views, 0)
+
+    def test_failed_flush(self):
+        """tests that a database error is logged and the views kept for the next flush"""
+        topic_views.add(self.topic.pk, 2)
+        with mock.patch('django.db.models.QuerySet.update', side_effect=DatabaseError), \
+                self.assertLogs('forum.counters', 'ERROR'):
+            self.assertEquals(topic_views.flush(), 0)
+        self.assertEquals(topic_views.pending(self.topic.pk), 2)
+        topic_views.flush()
+        self.topic.refresh_from_db()
+        self.assertEquals(self.topic.views, 2)
@@ -0,0 +1,85 @@
+"""
+NDJSON records of the forum's users, forums, topics and posts, as written by
+export_forum_data and read by import_forum_data.
+
+Each line is one object with a "type" and the row's columns, foreign keys
+under the field name holding the referenced primary key. Records are written
+parents first, users, forums, topics then posts, so a reader never meets a
+reference to a row it has not seen; primary keys are kept as they are.
+"""
+import gzip
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from django.contrib.auth.models import User
+from django.db.models import DateTimeField
+from django.utils.dateparse import parse_datetime
+from .models import Forum, Post, Topic
+
+# type: (model, fields), in the order records are written and inserted
+RECORDS = {
+    'user': (User, ('id', 'username', 'email', 'password', 'first_name', 'last_name',
+                    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login')),
+    'forum': (Forum, ('id', 'name', 'description')),
+    'topic': (Topic, ('id', 'forum', 'opener', 'subject', 'last_updated', 'views')),
+    'post': (Post, ('id', 'topic', 'created_by', 'created_at', 'updated_by', 'updated_at',
+                    'message', 'message_html', 'message_hash')),
+}
+
+
+def isoformat(value):
+    # full microseconds, where DjangoJSONEncoder rounds to milliseconds
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=isoformat)
+
+
+def open_file(path, mode):
+    """a text file, gzip compressed when the name ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def columns(model, fields):
+    """the attribute names of the fields, forum_id for forum"""
+    return [model._meta.get_field(name).attname for name in fields]
+
+
+def dump(type, fields, row):
+    return encoder.encode({'type': type, **dict(zip(fields, row))})
+
+
+def load(data):
+    """an unsaved instance from a decoded record"""
+    model, fields = RECORDS[data['type']]
+    values = {}
+    for name in fields:
+        if name not in data:
+            continue
+        field = model._meta.get_field(name)
+        value = data[name]
+        if isinstance(field, DateTimeField) and value is not None:
+            value = parse_datetime(value)
+        values[field.attname] = value
+    return model(**values)
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """lets bulk_create keep the values set on auto_now_add fields"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def timestamps_kept():
+    return explicit_timestamps(
+        Topic._meta.get_field('last_updated'), Post._meta.get_field('created_at'))
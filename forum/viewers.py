@@ -0,0 +1,98 @@
+"""
+Unique viewers of each topic, counted with a HyperLogLog per topic.
+
+A topic's sketch is 2 ** TOPIC_VIEWERS_PRECISION one-byte registers kept in
+the 'viewers' cache, the same size whether ten or ten million people read
+the topic, and adding a viewer who was already counted leaves it unchanged, so repeat
+views cost one cache read and no writes. Topic.views grows by however much
+the sketch's estimate grows, which keeps it within the estimate's standard
+error of the true number of distinct viewers, 1.04 / sqrt(registers):
+about 3.3% at the default precision of 10, 1 KB per topic.
+
+The cache must be shared by every server process, as with
+CACHE_BACKEND=redis: with the per process locmem default each worker keeps
+a sketch of its own, so a viewer is counted once per worker that serves
+them and the error bound no longer holds. The alias is separate from the
+page cache, whose culling would otherwise drop sketches.
+
+Concurrent first views from different processes may each credit the same
+increment, and a sketch evicted from the cache starts over, counting
+returning viewers again; both only ever over-count.
+"""
+import math
+from hashlib import blake2b
+from django.conf import settings
+from django.core.cache import caches
+
+
+class HyperLogLog:
+    """cardinality sketch over 64 bit hashes"""
+
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        size = 1 << precision
+        if registers is None or len(registers) != size:
+            registers = bytes(size)
+        self.registers = bytearray(registers)
+
+    def add(self, value):
+        """adds a string, returns whether the sketch changed"""
+        hashed = int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), 'big')
+        bits = 64 - self.precision
+        index = hashed >> bits
+        # position of the first set bit in the remaining bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank <= self.registers[index]:
+            return False
+        self.registers[index] = rank
+        return True
+
+    def estimate(self):
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            # linear counting is more accurate while most registers are empty
+            return size * math.log(size / zeros)
+        return raw
+
+
+class UniqueViewerTracker:
+    """per topic sketches in the viewers cache, with the views credited so far"""
+
+    @property
+    def cache(self):
+        return caches['viewers']
+
+    def key(self, topic_pk):
+        return f'topic_viewers:{topic_pk}'
+
+    def add(self, topic_pk, viewer):
+        """records a viewer of a topic, returns how many views that adds"""
+        key = self.key(topic_pk)
+        registers, credited = self.cache.get(key) or (None, 0)
+        sketch = HyperLogLog(settings.TOPIC_VIEWERS_PRECISION, registers)
+        if not sketch.add(viewer):
+            return 0
+        added = max(round(sketch.estimate()) - credited, 0)
+        self.cache.set(key, (bytes(sketch.registers), credited + added), None)
+        return added
+
+    def estimate(self, topic_pk):
+        registers, credited = self.cache.get(self.key(topic_pk)) or (None, 0)
+        return HyperLogLog(settings.TOPIC_VIEWERS_PRECISION, registers).estimate()
+
+
+topic_viewers = UniqueViewerTracker()
+
+
+def viewer_id(request):
+    """the user, else the session cookie, else the client address and agent"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        return f'session:{session_key}'
+    return 'client:{}:{}'.format(request.META.get('REMOTE_ADDR', ''),
+                                 request.META.get('HTTP_USER_AGENT', ''))
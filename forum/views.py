@@ -1,37 +1,91 @@
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
+from .archive import FORMATS as ARCHIVE_FORMATS, archive_response
 from .models import Forum, Topic, Post
+from .caching import (FORUMS, AnonymousPageCacheMixin, ConditionalGetMixin,
+                      forum_scope, topic_scope)
+from .counters import topic_views
 from .forms import NewTopicForm, PostForm
-from django.contrib.auth.decorators import login_required
-from django.db.models import Count
+from .pagination import CursorPaginationMixin
+from .search import search as search_posts
+from .viewers import topic_viewers, viewer_id
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.views.generic import UpdateView, ListView
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.urls import reverse
 
 
-class ForumListView(ListView):
+class ForumListView(AnonymousPageCacheMixin, ListView):
     """class for home view, extends from the generic views - ListView"""
     model = Forum
     context_object_name = 'forums'
     template_name = 'home.html'
 
+    def get_cache_scopes(self):
+        return [FORUMS]
 
-class TopicListView(ListView):
+    def get_queryset(self):
+        return Forum.objects.select_related(
+            'last_post__topic', 'last_post__created_by')
+
+
+class TopicListView(ConditionalGetMixin, AnonymousPageCacheMixin, CursorPaginationMixin,
+                    ListView):
     """class for forum topics, extends from the generic views - ListView"""
     model = Topic
     context_object_name = 'topics'
     template_name = 'topics.html'
     paginate_by = 25
+    cursor_ordering = '-last_updated'
+
+    def get_cache_scopes(self):
+        return [forum_scope(self.kwargs.get('pk'))]
+
+    def get_freshness_queryset(self):
+        return Forum.objects.filter(pk=self.kwargs.get('pk')).annotate(
+            latest=Max('topics__last_updated')).values_list('latest', 'topic_count')
+
+    def make_freshness(self, row):
+        # topic_count catches deletions, which never move the latest update
+        latest, topic_count = row
+        return latest, f'{latest and latest.isoformat()}:{topic_count}'
 
     def get_context_data(self, **kwargs):
         kwargs['forum'] = self.forum
         return super().get_context_data(**kwargs)
 
+    def get_topics(self):
+        # a correlated count only runs for the rows of the page, where a
+        # join and GROUP BY would count every post in the forum, then sort
+        posts = Post.objects.filter(topic=OuterRef('pk')).order_by().values(
+            'topic').annotate(total=Count('pk')).values('total')
+        return self.forum.topics.select_related('opener').order_by(
+            '-last_updated', '-pk').annotate(replies=Coalesce(Subquery(posts), 0) - 1)
+
     def get_queryset(self):
         self.forum = get_object_or_404(Forum, pk=self.kwargs.get('pk'))
-        queryset = self.forum.topics.order_by(
-            '-last_updated').annotate(replies=Count('posts') - 1)
-        return queryset
+        return self.get_topics()
+
+
+def search(request):
+    """renders ranked full-text matches on topic subjects and post messages"""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    results, has_next = search_posts(query, page) if query else ([], False)
+    return render(request, 'search.html', {
+        'query': query,
+        'results': results,
+        'page': page,
+        'has_next': has_next,
+    })
 
 
 @login_required
@@ -44,39 +98,75 @@ def new_topic(request, pk):
             topic = new_form.save(commit=False)
             topic.forum = forum
             topic.opener = request.user
-            topic.save()
-            Post.objects.create(
-                message=new_form.cleaned_data.get('message'),
-                topic=topic,
-                created_by=request.user
-            )
+            with transaction.atomic():
+                topic.save()
+                Post.objects.create(
+                    message=new_form.cleaned_data.get('message'),
+                    topic=topic,
+                    created_by=request.user
+                )
             return redirect('topic_posts', pk=pk, topic_pk=topic.pk)
     else:
         new_form = NewTopicForm()
     return render(request, 'new_topic.html', {'forum': forum, 'form': new_form})
 
 
-class PostListView(ListView):
+class PostListView(ConditionalGetMixin, AnonymousPageCacheMixin, CursorPaginationMixin,
+                   ListView):
     """class for posts, extends from the generic views - ListView"""
     model = Post
     context_object_name = 'posts'
     template_name = 'topic_posts.html'
-    paginate_by = 2
+    cursor_ordering = 'created_at'
+
+    def get_paginate_by(self, queryset):
+        return settings.POSTS_PER_PAGE
+
+    def get_cache_scopes(self):
+        return [topic_scope(self.kwargs.get('topic_pk'))]
+
+    def get_freshness_queryset(self):
+        return Topic.objects.filter(
+            forum__pk=self.kwargs.get('pk'), pk=self.kwargs.get('topic_pk')).annotate(
+            edited=Max('posts__updated_at')).values_list(
+            'last_updated', 'edited', 'forum__post_count')
+
+    def make_freshness(self, row):
+        # the forum's post_count catches deleted posts
+        last_updated, edited, post_count = row
+        latest = max(last_updated, edited) if edited else last_updated
+        return latest, f'{latest.isoformat()}:{post_count}'
+
+    def get_etag_scopes(self):
+        # the authors' post counts and avatars are not in the freshness row
+        return self.get_cache_scopes()
+
+    def cache_hit(self, request):
+        self.record_view(self.kwargs.get('topic_pk'))
+
+    def record_view(self, topic_pk):
+        """counts the view if it comes from a new viewer, returns the views added"""
+        added = topic_viewers.add(topic_pk, viewer_id(self.request))
+        if added:
+            topic_views.add(topic_pk, added)
+        return added
 
     def get_context_data(self, **kwargs):
-        session_key = f'viewed_topic_{self.topic.pk}'
-        if not self.request.session.get(session_key, False):
-            self.topic.views += 1
-            self.topic.save()
-            self.request.session[session_key] = True
         kwargs['topic'] = self.topic
         return super().get_context_data(**kwargs)
 
+    def get_topic_queryset(self):
+        return Topic.objects.select_related('forum').filter(
+            forum__pk=self.kwargs.get('pk'), pk=self.kwargs.get('topic_pk'))
+
+    def get_posts(self):
+        return self.topic.posts.select_related(
+            'created_by__profile').order_by('created_at', 'pk')
+
     def get_queryset(self):
-        self.topic = get_object_or_404(Topic, forum__pk=self.kwargs.get(
-            'pk'), pk=self.kwargs.get('topic_pk'))
-        queryset = self.topic.posts.order_by('created_at')
-        return queryset
+        self.topic = get_object_or_404(self.get_topic_queryset())
+        self.topic.views += self.record_view(self.topic.pk)
+        return self.get_posts()
 
 
 @login_required
@@ -89,17 +179,31 @@ def reply(request, pk, topic_pk):
             post = reply_form.save(commit=False)
             post.topic = topic
             post.created_by = request.user
-            post.save()
-            topic.last_updated = timezone.now()
-            topic.save()
+            with transaction.atomic():
+                post.save()
+                Topic.objects.filter(pk=topic.pk).update(last_updated=post.created_at)
 
+            # a new reply is always on the last page, which both pagination
+            # modes resolve without counting the topic's posts here
             topic_url = reverse('topic_posts', kwargs={
                                 'pk': pk, 'topic_pk': topic_pk})
-            topic_post_url = f'{topic_url}?page={topic.get_page_count}#{post.pk}'
+            topic_post_url = f'{topic_url}?page=last#{post.pk}'
             return redirect(topic_post_url)
     else:
         reply_form = PostForm()
-    return render(request, 'reply.html', {'topic': topic, 'form': reply_form})
+    posts = topic.posts.select_related('created_by').order_by(
+        '-created_at', '-pk')[:settings.POSTS_PER_PAGE]
+    return render(request, 'reply.html', {'topic': topic, 'posts': posts, 'form': reply_form})
+
+
+@user_passes_test(lambda user: user.is_staff)
+def topic_archive(request, pk, topic_pk):
+    """streams every post of a topic to moderators, as ?format=ndjson or html"""
+    topic = get_object_or_404(Topic, forum__pk=pk, pk=topic_pk)
+    format = request.GET.get('format', 'ndjson')
+    if format not in ARCHIVE_FORMATS:
+        raise Http404(f'Unknown archive format {format!r}')
+    return archive_response(request, topic, format)
 
 
 @method_decorator(login_required, name='dispatch')
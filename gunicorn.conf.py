@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for production, read from the environment.
+
+WSGI (the default) runs threaded sync workers:
+
+    gunicorn mydjangoapp.wsgi:application
+
+ASGI runs uvicorn workers, with ASYNC_VIEWS=True for the async listings:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker ASYNC_VIEWS=True \
+        gunicorn mydjangoapp.asgi:application
+
+benchmarks/asgi_vs_wsgi.py measured ASGI about 30% slower on reads, so it
+is opt-in.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# only used by gthread workers
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then, staggered so they do not restart together
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+
+def on_starting(server):
+    # the settings refuse a per process page cache shared by several workers,
+    # so they are told how many there are, --workers included
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
@@ -0,0 +1,2 @@
+# registers the connection_created receiver tuning SQLite connections
+from . import db  # noqa: F401
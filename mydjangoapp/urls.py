@@ -1,24 +1,36 @@
 """
 URL configuration for mydjangoapp project.
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
-from forum import views
+from forum import views, async_views, metrics
 from accounts import views as accounts_views
+from accounts.forms import QueuedPasswordResetForm
 from django.contrib.auth.views import (LogoutView, LoginView, PasswordResetView,
                                        PasswordResetDoneView, PasswordResetCompleteView,
                                        PasswordResetConfirmView, PasswordChangeDoneView, PasswordChangeView)
 
+if settings.ASYNC_VIEWS:
+    ForumListView = async_views.AsyncForumListView
+    TopicListView = async_views.AsyncTopicListView
+    PostListView = async_views.AsyncPostListView
+else:
+    ForumListView = views.ForumListView
+    TopicListView = views.TopicListView
+    PostListView = views.PostListView
+
 
 urlpatterns = [
-    path('', views.ForumListView.as_view(), name='home'),
+    path('', ForumListView.as_view(), name='home'),
     path('login/', LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('signup/', accounts_views.signup, name='signup'),
     path('reset/', PasswordResetView.as_view(template_name='password_reset.html',
                                              email_template_name='password_reset_email.html',
-                                             subject_template_name='password_reset_subject.txt'),
+                                             subject_template_name='password_reset_subject.txt',
+                                             form_class=QueuedPasswordResetForm),
          name='password_reset'),
     path('reset/done/', PasswordResetDoneView.as_view(template_name='password_reset_done.html'),
          name='password_reset_done'),
@@ -35,10 +47,16 @@ urlpatterns = [
     path('forum/<int:pk>/topics/<int:topic_pk>/reply/',
          views.reply, name='reply'),
     path('forum/<int:pk>/topics/<int:topic_pk>/',
-         views.PostListView.as_view(), name='topic_posts'),
-    path('forum/<int:pk>/', views.TopicListView.as_view(), name='forum_topics'),
+         PostListView.as_view(), name='topic_posts'),
+    path('forum/<int:pk>/topics/<int:topic_pk>/archive/',
+         views.topic_archive, name='topic_archive'),
+    path('forum/<int:pk>/', TopicListView.as_view(), name='forum_topics'),
     path('forum/<int:pk>/new/', views.new_topic, name='new_topic'),
+    path('search/', views.search, name='search'),
     path('forum/<int:pk>/topics/<int:topic_pk>/posts/<int:post_pk>/edit/',
          views.PostUpdateView.as_view(), name='edit'),
     path('admin/', admin.site.urls),
 ]
+
+if settings.REQUEST_METRICS:
+    urlpatterns.append(path('metrics/', metrics.metrics, name='metrics'))
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mydjangoapp.settings')
 
 application = get_wsgi_application()
+
+# servers skip the system checks, so the production profile logs its own
+from forum.checks import warn_on_startup  # noqa: E402
+from forum.counters import topic_views  # noqa: E402
+
+warn_on_startup()
+# topic views are written even while no requests come in
+topic_views.start_timer()